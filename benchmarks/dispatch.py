@@ -0,0 +1,43 @@
+# Micro benchmark of the per node handler dispatch: the previous getattr lookup by "<localname>_def"
+# against the tag keyed handler table. Run with: python benchmarks/dispatch.py
+import os
+import timeit
+
+from lxml import etree
+
+from xml2drawio.xml2drawio import Converter
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), '..', 'tests', 'camel-context.xml')
+
+
+def getattr_dispatch(converter, nodes):
+    for node in nodes:
+        node_name = node.tag.partition('}')[2]
+        if node_name == 'propertyPlaceholder':
+            continue
+        process_function_name = node_name + "_def"
+        if getattr(converter, process_function_name, None) is None:
+            raise KeyError(process_function_name)
+        getattr(converter, process_function_name)
+
+
+def table_dispatch(converter, nodes):
+    handlers = converter.handlers
+    for node in nodes:
+        if handlers.get(node.tag) is None:
+            raise KeyError(node.tag)
+
+
+def main(number=200):
+    root = etree.parse(CAMEL_CONTEXT, etree.XMLParser(remove_comments=True)).getroot()
+    context = root.find('{http://camel.apache.org/schema/spring}camelContext')
+    converter = Converter()
+    nodes = [node for node in context.iter() if node is not context and node.tag in converter.handlers]
+
+    for name, dispatch in (('getattr', getattr_dispatch), ('table', table_dispatch)):
+        seconds = timeit.timeit(lambda: dispatch(converter, nodes), number=number)
+        print(f'{name:8} {seconds / (number * len(nodes)) * 1e9:8.1f} ns/node')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Synthetic Spring / Camel context generator for the benchmarks.
+# Example: python benchmarks/generate.py --routes 1000 --depth 3 --fanout 3 --endpoints 50 > big-context.xml
+import argparse
+import sys
+
+HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans"
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+    <camelContext id="syntheticContext" xmlns="http://camel.apache.org/schema/spring">
+'''
+FOOTER = '''    </camelContext>
+</beans>
+'''
+
+
+def write_block(output, depth, fanout, route, indent):
+    # alternates choice and multicast blocks until depth is reached, the leaves are a setBody and a to
+    pad = ' ' * indent
+    if depth == 0:
+        output.write(f'{pad}<setBody><simple>${{header.value{route}}}</simple></setBody>\n')
+        output.write(f'{pad}<to uri="log:route{route}?level=DEBUG"/>\n')
+        return
+
+    if depth % 2:
+        output.write(f'{pad}<choice>\n')
+        for branch in range(fanout):
+            output.write(f'{pad}    <when><simple>${{header.branch}} == {branch}</simple>\n')
+            write_block(output, depth - 1, fanout, route, indent + 8)
+            output.write(f'{pad}    </when>\n')
+        output.write(f'{pad}    <otherwise>\n')
+        write_block(output, depth - 1, fanout, route, indent + 8)
+        output.write(f'{pad}    </otherwise>\n')
+        output.write(f'{pad}</choice>\n')
+    else:
+        output.write(f'{pad}<multicast>\n')
+        for _ in range(fanout):
+            write_block(output, depth - 1, fanout, route, indent + 4)
+        output.write(f'{pad}</multicast>\n')
+
+
+def generate(output, routes=100, depth=2, fanout=2, endpoints=10):
+    output.write(HEADER)
+    for endpoint in range(endpoints):
+        output.write(f'        <endpoint id="endpoint{endpoint}" uri="direct:endpoint{endpoint}"/>\n')
+    for route in range(routes):
+        output.write(f'        <route id="route{route}">\n')
+        output.write(f'            <from uri="direct:route{route}"/>\n')
+        write_block(output, depth, fanout, route, 12)
+        if endpoints:
+            output.write(f'            <to uri="ref:endpoint{route % endpoints}"/>\n')
+        output.write('        </route>\n')
+    output.write(FOOTER)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generates a synthetic camel context")
+    p.add_argument('--routes', type=int, default=100)
+    p.add_argument('--depth', type=int, default=2, help='nesting depth of choice / multicast blocks')
+    p.add_argument('--fanout', type=int, default=2, help='when branches of each choice, children of each multicast')
+    p.add_argument('--endpoints', type=int, default=10, help='shared <endpoint> definitions referenced by the routes')
+    args = p.parse_args()
+    generate(sys.stdout, args.routes, args.depth, args.fanout, args.endpoints)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# Benchmark harness: converts synthetic contexts of several sizes and times parse, walk and emit separately.
+# Every case runs in a fresh interpreter so the peak RSS belongs to that case only. The memory kept per node
+# is measured with tracemalloc on a separate walk so the tracing does not slow down the timed ones.
+#
+#   python benchmarks/run.py --output results.json
+#   python benchmarks/run.py --case 5000,3,3,50 --baseline results.json
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate  # noqa: E402
+
+# routes, depth, fanout, endpoints
+DEFAULT_CASES = ['100,2,2,10', '1000,2,2,50', '1000,4,2,50', '200,3,4,20']
+PHASES = ('parse', 'walk', 'emit_csv', 'emit_drawio')
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def run_case(case, repeat=3, walker='iterative'):
+    from xml2drawio.xml2drawio import SILENT, Converter
+
+    routes, depth, fanout, endpoints = (int(value) for value in case.split(','))
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as xml_file:
+        generate.generate(xml_file, routes, depth, fanout, endpoints)
+    try:
+        timings = {phase: [] for phase in PHASES}
+        for _ in range(repeat):
+            converter = Converter(verbosity=SILENT, id_strategy='sequential', walker=walker)
+            seconds, root = timed(converter.parse_xml, xml_file.name)
+            timings['parse'].append(seconds)
+            timings['walk'].append(timed(converter.walk, root)[0])
+            timings['emit_csv'].append(timed(converter.write_diagram, io.StringIO(), converter.rows, 'csv')[0])
+            timings['emit_drawio'].append(timed(converter.write_diagram, io.StringIO(), converter.rows, 'drawio')[0])
+            del root
+        bytes_per_node = node_memory(Converter, xml_file.name, walker)
+
+        return {
+            'case': case,
+            'walker': walker,
+            'routes': routes,
+            'depth': depth,
+            'fanout': fanout,
+            'endpoints': endpoints,
+            'file_bytes': os.path.getsize(xml_file.name),
+            'rows': len(converter.rows),
+            # best of the repetitions
+            'seconds': {phase: min(values) for phase, values in timings.items()},
+            # kilobytes on linux
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'bytes_per_node': bytes_per_node,
+        }
+    finally:
+        os.remove(xml_file.name)
+
+
+def node_memory(converter_class, xml_path, walker):
+    # bytes still allocated after the walk (the graph, ids, labels and the per node bookkeeping) per node
+    from xml2drawio.xml2drawio import SILENT
+    converter = converter_class(verbosity=SILENT, id_strategy='sequential', walker=walker)
+    root = converter.parse_xml(xml_path)
+    tracemalloc.start()
+    try:
+        converter.walk(root)
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return round(retained / len(converter.rows), 1)
+
+
+def run_isolated(case, repeat, walker):
+    output = subprocess.run([sys.executable, __file__, '--single', case, '--repeat', str(repeat), '--walker', walker],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as baseline_file:
+        baseline = {result['case']: result for result in json.load(baseline_file)['results']}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['case'])
+        if previous is None:
+            continue
+        for phase, seconds in result['seconds'].items():
+            before = previous['seconds'].get(phase)
+            if before and seconds > before * tolerance:
+                regressions.append(f"{result['case']} {phase}: {before:.4f}s -> {seconds:.4f}s")
+        before = previous.get('bytes_per_node')
+        if before and result['bytes_per_node'] > before * tolerance:
+            regressions.append(f"{result['case']} memory: {before} -> {result['bytes_per_node']} bytes per node")
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="xml2drawio benchmarks")
+    p.add_argument('--case', action='append', help='routes,depth,fanout,endpoints (repeatable)')
+    p.add_argument('--repeat', type=int, default=3, help='repetitions of each case, the best time is kept')
+    p.add_argument('--output', help='write the results as json to this file')
+    p.add_argument('--baseline', help='results json of a previous run to compare with')
+    p.add_argument('--tolerance', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    p.add_argument('--walker', default='iterative', choices=('iterative', 'recursive'))
+    p.add_argument('--single', help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.single:
+        print(json.dumps(run_case(args.single, args.repeat, args.walker)))
+        return 0
+
+    from xml2drawio import version
+    results = [run_isolated(case, args.repeat, args.walker) for case in args.case or DEFAULT_CASES]
+    report = {'version': version(), 'python': platform.python_version(), 'time': time.time(), 'results': results}
+
+    print(f"{'case':>14} {'rows':>8} " + ' '.join(f'{phase:>11}' for phase in PHASES)
+          + f" {'peak MB':>8} {'B/node':>7}")
+    for result in results:
+        print(f"{result['case']:>14} {result['rows']:>8} "
+              + ' '.join(f"{result['seconds'][phase]:>10.4f}s" for phase in PHASES)
+              + f" {result['peak_rss_kb'] / 1024:>8.1f} {result['bytes_per_node']:>7.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print('regression:', regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,18 @@
-import importlib.metadata
-__version__ = importlib.metadata.version('camel-xml2drawio')
\ No newline at end of file
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def version():
+    # importlib.metadata is slow to import, it is only loaded when the version is needed
+    import importlib.metadata
+    return importlib.metadata.version('camel-xml2drawio')
+
+
+def __getattr__(name):
+    # the version and the library api are loaded on first use so importing the package stays cheap
+    if name == '__version__':
+        return version()
+    if name in ('convert', 'Converter', 'Diagram', 'UnknownElementError'):
+        from xml2drawio import xml2drawio
+        return getattr(xml2drawio, name)
+    raise AttributeError(f"module 'xml2drawio' has no attribute '{name}'")
@@ -0,0 +1,156 @@
+import concurrent.futures
+import functools
+import glob
+import json
+import os
+import time
+
+from rich.table import Table
+
+from xml2drawio.cache import RouteCache
+from xml2drawio.output import open_output
+from xml2drawio.xml2drawio import SUMMARY, Converter, get_console
+
+
+def collect_files(source):
+    # a directory (all the xml files below it), a glob pattern or a manifest file with one path per line
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '**', '*.xml'), recursive=True))
+    if glob.has_magic(source):
+        return sorted(glob.glob(source, recursive=True))
+
+    base_dir = os.path.dirname(source)
+    with open(source, "r") as manifest:
+        lines = (line.strip() for line in manifest)
+        return [os.path.join(base_dir, line) for line in lines if line and not line.startswith('#')]
+
+
+def convert_file(xml_path, stream=False, cache_dir=None, verbosity=SUMMARY, events_path=None, id_strategy='uuid',
+                 walker='iterative', follow_imports=True, import_paths=(), unknown='fail', reduction='none',
+                 reduce_depth=1, parser='etree', output_path=None, output_format='csv', compressed=False):
+    # runs in a worker process, errors are returned so one bad file does not stop the batch. With an output
+    # path the diagram is written here as soon as the file is converted and the rows are not sent back
+    start = time.perf_counter()
+    route_cache = RouteCache(cache_dir) if cache_dir else None
+    events = open(events_path, "a", buffering=1) if events_path else None
+    try:
+        converter = Converter(cache=route_cache, verbosity=verbosity, events=events, id_strategy=id_strategy,
+                              walker=walker, follow_imports=follow_imports, import_paths=import_paths,
+                              unknown=unknown, reduction=reduction, reduce_depth=reduce_depth,
+                              parser=parser)
+        rows = converter.convert_file(xml_path, stream=stream)
+        links = converter.route_links()
+        if output_path is not None:
+            with open(output_path, "w") as diagram_file:
+                Converter.write_diagram(diagram_file, rows, output_format, compressed, links)
+            rows = links = None
+        return xml_path, rows, None, time.perf_counter() - start, converter.unknown_nodes, links
+    except Exception as e:
+        return xml_path, None, f'{type(e).__name__}: {e}', time.perf_counter() - start, {}, []
+    finally:
+        if route_cache:
+            route_cache.close()
+        if events:
+            events.close()
+
+
+def file_scoped(rows, index):
+    # sequential and hash ids are only unique inside one file, they are prefixed when merging
+    return [(f'{index}.{node_id}', label, shape, f'{index}.{ref}' if ref != '' else '')
+            for node_id, label, shape, ref in rows]
+
+
+def file_scoped_links(links, index):
+    return [(f'{index}.{source}', f'{index}.{target}') for source, target in links]
+
+
+def output_name(xml_path, used, extension='.csv'):
+    name = os.path.splitext(os.path.basename(xml_path))[0]
+    candidate = name
+    count = 1
+    while candidate in used:
+        candidate = f'{name}_{count}'
+        count += 1
+    used.add(candidate)
+    return candidate + extension
+
+
+def run_batch(source, workers=None, output_dir='.', merge=None, stream=False, cache_dir=None,
+              verbosity=SUMMARY, events_path=None, id_strategy='uuid', output_format='csv', compressed=False,
+              walker='iterative', follow_imports=True, import_paths=(), unknown='fail', unknown_report=None,
+              reduction='none', reduce_depth=1, parser='etree'):
+    files = collect_files(source)
+    if verbosity >= SUMMARY:
+        get_console().log("batch files:", len(files))
+    start = time.perf_counter()
+
+    worker = functools.partial(convert_file, stream=stream, cache_dir=cache_dir,
+                               verbosity=verbosity, events_path=events_path, id_strategy=id_strategy,
+                               walker=walker, follow_imports=follow_imports, import_paths=import_paths,
+                               unknown=unknown, reduction=reduction, reduce_depth=reduce_depth,
+                               parser=parser, output_format=output_format, compressed=compressed)
+    # without --merge every worker writes its own diagram, only the statuses come back
+    outputs = [None] * len(files)
+    if not merge:
+        os.makedirs(output_dir, exist_ok=True)
+        used = set()
+        outputs = [os.path.join(output_dir, output_name(xml_path, used, '.' + output_format)) for xml_path in files]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(worker, xml_path, output_path=output_path)
+                   for xml_path, output_path in zip(files, outputs)]
+        results = [future.result() for future in futures]
+
+    if merge:
+        merged = [row for index, (_, rows, error, _, _, _) in enumerate(results) if error is None
+                  for row in (rows if id_strategy == 'uuid' else file_scoped(rows, index))]
+        merged_links = [link for index, (_, _, error, _, _, links) in enumerate(results) if error is None
+                        for link in (links if id_strategy == 'uuid' else file_scoped_links(links, index))]
+        with open_output(merge) as merge_file:
+            Converter.write_diagram(merge_file, merged, output_format, compressed, merged_links)
+
+    unknown_nodes = merge_unknown(results)
+    if unknown_report:
+        with open(unknown_report, "w") as report_file:
+            json.dump(unknown_nodes, report_file, indent=2)
+    if verbosity >= SUMMARY:
+        print_summary(results, time.perf_counter() - start)
+        if unknown_nodes:
+            print_unknown(unknown_nodes)
+    return 1 if any(error is not None for _, _, error, _, _, _ in results) else 0
+
+
+def merge_unknown(results):
+    # {local name: {'count': n, 'files': {xml path: [source lines]}}} of all the files
+    report = {}
+    for xml_path, _, _, _, unknown_nodes, _ in results:
+        for node, lines in unknown_nodes.items():
+            entry = report.setdefault(node, {'count': 0, 'files': {}})
+            entry['count'] += len(lines)
+            entry['files'][xml_path] = lines
+    return dict(sorted(report.items(), key=lambda item: -item[1]['count']))
+
+
+def print_summary(results, wall_time):
+    table = Table(title="xml2drawio batch")
+    table.add_column("file")
+    table.add_column("status")
+    table.add_column("seconds", justify="right")
+    for xml_path, _, error, seconds, _, _ in results:
+        status = "[green]ok" if error is None else f"[red]{error}"
+        table.add_row(xml_path, status, f'{seconds:.3f}')
+    get_console().print(table)
+
+    failures = sum(1 for _, _, error, _, _, _ in results if error is not None)
+    get_console().print(f'{len(results) - failures} succeeded, {failures} failed, wall time {wall_time:.3f}s')
+
+
+def print_unknown(unknown_nodes):
+    table = Table(title="unknown elements")
+    table.add_column("element")
+    table.add_column("count", justify="right")
+    table.add_column("files", justify="right")
+    table.add_column("first occurrence")
+    for node, entry in unknown_nodes.items():
+        xml_path, lines = next(iter(entry['files'].items()))
+        table.add_row(node, str(entry['count']), str(len(entry['files'])), f'{xml_path}:{lines[0]}')
+    get_console().print(table)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from lxml import etree
+
+from xml2drawio import version
+
+# layout of the cached entries, part of the key so entries of an older layout are not read
+FORMAT = 2
+
+
+def default_cache_dir():
+    return os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'xml2drawio')
+
+
+class RouteCache:
+    # On disk cache of the rows emitted for each route, keyed by the canonical hash of the route subtree
+    # and the tool version, with the uris its ref: endpoints and the classes its beans resolve to. Entries are evicted least recently used first when max_entries is exceeded.
+
+    def __init__(self, cache_dir=None, max_entries=10000, in_memory=False):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # new entries and the last use of the entries read are kept here and written in one short transaction
+        # by flush(), so batch workers sharing the database never hold its write lock during a conversion
+        self.pending = {}
+        self.used = {}
+        if in_memory:
+            self.connection = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+        else:
+            cache_dir = cache_dir or default_cache_dir()
+            os.makedirs(cache_dir, exist_ok=True)
+            self.connection = sqlite3.connect(os.path.join(cache_dir, 'routes.sqlite'), timeout=30,
+                                              isolation_level=None)
+            # readers are not blocked by a writer
+            self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, rows TEXT NOT NULL, last_used REAL NOT NULL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS routes_last_used ON routes (last_used)')
+
+    @staticmethod
+    def route_key(route, salt='', endpoints=(), beans=()):
+        # endpoints and beans are the (id, uri) and (id, class) of the endpoints and beans referenced by the
+        # route, defined outside of it
+        digest = hashlib.sha256(f'{version()}\n{FORMAT}\n{salt}\n'.encode())
+        digest.update(etree.tostring(route, method='c14n'))
+        digest.update(json.dumps(sorted(endpoints)).encode())
+        digest.update(json.dumps(sorted(beans)).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.connection.execute('SELECT rows FROM routes WHERE key = ?', (key,)).fetchone()
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used[key] = time.time()
+        return json.loads(entry[0])
+
+    def put(self, key, rows):
+        self.pending[key] = (json.dumps(rows), time.time())
+
+    def evict(self):
+        self.connection.execute(
+            'DELETE FROM routes WHERE key NOT IN (SELECT key FROM routes ORDER BY last_used DESC LIMIT ?)',
+            (self.max_entries,))
+
+    def flush(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            self.connection.executemany('INSERT OR REPLACE INTO routes (key, rows, last_used) VALUES (?, ?, ?)',
+                                        [(key, rows, last_used) for key, (rows, last_used) in self.pending.items()])
+            self.connection.executemany('UPDATE routes SET last_used = ? WHERE key = ?',
+                                        [(last_used, key) for key, last_used in self.used.items()])
+            self.evict()
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+        self.pending.clear()
+        self.used.clear()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    # Rows are stored without the ids of the run that produced them: ids created inside the route are
+    # replaced by their position, and the parent (camel context) id by None, fresh ids are created on load.
+    # Reproducible ids (hash strategy) can be stored as they are with renumber=False
+    @staticmethod
+    def pack_rows(rows, parent_id, renumber=True):
+        positions = {}
+        for row in rows:
+            if row[0] != parent_id:
+                positions.setdefault(row[0], len(positions) if renumber else str(row[0]))
+
+        def pack(value):
+            return None if value == parent_id else positions.get(value, '')
+
+        return [[pack(node_id), label, shape, pack(ref)] for node_id, label, shape, ref in rows]
+
+    @staticmethod
+    def unpack_rows(rows, parent_id, new_id=None):
+        ids = {}
+
+        def unpack(value):
+            if value is None:
+                return parent_id
+            if value == '' or new_id is None:
+                return value
+            if value not in ids:
+                ids[value] = new_id()
+            return ids[value]
+
+        return [(unpack(node_id), label, shape, unpack(ref)) for node_id, label, shape, ref in rows]
@@ -0,0 +1,121 @@
+import os
+
+from lxml import etree
+
+BEANS_NS = 'http://www.springframework.org/schema/beans'
+CAMEL_NS = 'http://camel.apache.org/schema/spring'
+IMPORT_TAG = f'{{{BEANS_NS}}}import'
+BEAN_TAG = f'{{{BEANS_NS}}}bean'
+ENDPOINT_TAG = f'{{{CAMEL_NS}}}endpoint'
+RESOURCE_PREFIXES = ('classpath*:', 'classpath:', 'file:')
+
+
+class Document:
+    # what the converter needs from an imported spring file: its imports and the endpoint and bean ids
+
+    def __init__(self, path, mtime, imports, endpoints, beans):
+        self.path = path
+        self.mtime = mtime
+        self.imports = imports
+        self.endpoints = endpoints
+        self.beans = beans
+
+
+def index_document(root, path=None, mtime=None):
+    imports = [element.attrib['resource'] for element in root.iter(IMPORT_TAG) if 'resource' in element.attrib]
+    endpoints = {element.attrib['id']: element.attrib['uri'] for element in root.iter(ENDPOINT_TAG)
+                 if 'id' in element.attrib and 'uri' in element.attrib}
+    beans = {element.attrib['id']: element.attrib.get('class', '') for element in root.iter(BEAN_TAG)
+             if 'id' in element.attrib}
+    return Document(path, mtime, imports, endpoints, beans)
+
+
+class DefinitionsTarget:
+    # parser target collecting the same indexes as index_document without building the tree, for the files
+    # converted in streaming mode
+
+    def __init__(self):
+        self.imports = []
+        self.endpoints = {}
+        self.beans = {}
+
+    def start(self, tag, attrib):
+        if tag == IMPORT_TAG and 'resource' in attrib:
+            self.imports.append(attrib['resource'])
+        elif tag == ENDPOINT_TAG and 'id' in attrib and 'uri' in attrib:
+            self.endpoints[attrib['id']] = attrib['uri']
+        elif tag == BEAN_TAG and 'id' in attrib:
+            self.beans[attrib['id']] = attrib.get('class', '')
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self
+
+
+def scan_document(path):
+    target = etree.parse(path, etree.XMLParser(target=DefinitionsTarget(), huge_tree=True))
+    return Document(path, None, target.imports, target.endpoints, target.beans)
+
+
+def resolve_resource(resource, base_dir, import_paths=()):
+    # classpath: and file: resources are looked up relative to the importing file and then in the import paths
+    for prefix in RESOURCE_PREFIXES:
+        if resource.startswith(prefix):
+            resource = resource[len(prefix):]
+            break
+    if os.path.isabs(resource):
+        return resource if os.path.isfile(resource) else None
+    for directory in (base_dir, *import_paths):
+        candidate = os.path.join(directory, resource.lstrip('/'))
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+class DocumentCache:
+    # Imported files are parsed once and reused by every conversion of the process (batch worker,
+    # watch session), a file is parsed again only when its modification time changes
+
+    def __init__(self):
+        self.documents = {}
+        self.parses = 0
+
+    def load(self, path):
+        path = os.path.realpath(path)
+        mtime = os.stat(path).st_mtime_ns
+        document = self.documents.get(path)
+        if document is None or document.mtime != mtime:
+            root = etree.parse(path, etree.XMLParser(remove_comments=True)).getroot()
+            document = index_document(root, path, mtime)
+            self.documents[path] = document
+            self.parses += 1
+        return document
+
+    def imported(self, imports, base_dir, import_paths=(), loaded=None):
+        # documents imported directly or transitively, and the resources that were not found
+        loaded = set() if loaded is None else loaded
+        documents = []
+        missing = []
+        pending = [(resource, base_dir) for resource in reversed(imports)]
+        while pending:
+            resource, directory = pending.pop()
+            path = resolve_resource(resource, directory, import_paths)
+            if path is None:
+                missing.append(resource)
+                continue
+            document = self.load(path)
+            if document.path in loaded:
+                continue
+            loaded.add(document.path)
+            documents.append(document)
+            pending.extend((child, os.path.dirname(document.path)) for child in reversed(document.imports))
+        return documents, missing
+
+
+# shared by all the converters of the process
+DOCUMENTS = DocumentCache()
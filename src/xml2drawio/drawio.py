@@ -0,0 +1,165 @@
+import base64
+import html
+import urllib.parse
+import zlib
+from xml.sax.saxutils import quoteattr
+
+# geometry of the shapes, the same width and height used by the csv import template
+WIDTH = 150
+HEIGHT = 90
+LEVEL_SPACING = 60
+NODE_SPACING = 40
+
+VERTEX_STYLE = 'shape={shape};html=1;strokeWidth=2;outlineConnect=0;dashed=0;align=center;fontSize=12;' \
+               'fillColor=#c0f5a9;verticalLabelPosition=bottom;verticalAlign=top;'
+EDGE_STYLE = 'curved=0;endArrow=none;endFill=0;dashed=0;strokeColor=#6c8ebf;'
+# calls from a to, toD or wire tap to the route consuming the endpoint
+CALL_STYLE = 'curved=1;endArrow=classic;endFill=1;dashed=1;strokeColor=#b85450;'
+
+
+def build_tree(rows):
+    # nodes by id in order of appearance, a row repeating an id updates the label and shape like the csv import
+    nodes = {}
+    parents = {}
+    for node_id, label, shape, ref in rows:
+        key = str(node_id)
+        if key not in nodes:
+            parents[key] = str(ref)
+        nodes[key] = (label, shape)
+
+    children = {}
+    roots = []
+    for key, parent in parents.items():
+        if parent in nodes and parent != key:
+            children.setdefault(parent, []).append(key)
+        else:
+            roots.append(key)
+    return nodes, parents, children, roots
+
+
+def layout(roots, children):
+    # Horizontal tree layout in a single pass: the depth gives the column, leaves take consecutive rows
+    # and every parent is centered between its first and last child. Iterative so any depth works.
+    positions = {}
+    slot = 0
+    for root in roots:
+        stack = [(root, 0, False)]
+        while stack:
+            key, depth, visited = stack.pop()
+            kids = children.get(key)
+            if visited:
+                first, last = positions[kids[0]][1], positions[kids[-1]][1]
+                positions[key] = (depth, (first + last) / 2)
+            elif key in positions:
+                continue
+            elif kids:
+                positions[key] = (depth, None)
+                stack.append((key, depth, True))
+                stack.extend((kid, depth + 1, False) for kid in reversed(kids) if kid not in positions)
+            else:
+                positions[key] = (depth, slot)
+                slot += 1
+    return {key: (depth * (WIDTH + LEVEL_SPACING), row * (HEIGHT + NODE_SPACING))
+            for key, (depth, row) in positions.items()}
+
+
+def graph_cells(rows, links=None, calls=()):
+    # links maps node ids to the id of the page they open (index page), calls are (source, target) node ids
+    nodes, parents, children, roots = build_tree(rows)
+    positions = layout(roots, children)
+    links = links or {}
+
+    yield '<mxCell id="0"/>'
+    yield '<mxCell id="1" parent="0"/>'
+    for key, (label, shape) in nodes.items():
+        x, y = positions[key]
+        value = quoteattr(html.escape(str(label)))
+        geometry = f'<mxGeometry x="{x:g}" y="{y:g}" width="{WIDTH}" height="{HEIGHT}" as="geometry"/>'
+        style = quoteattr(VERTEX_STYLE.format(shape=shape))
+        if key in links:
+            yield f'<UserObject id={quoteattr("n" + key)} label={value} ' \
+                  f'link={quoteattr("data:page/id," + links[key])}>' \
+                  f'<mxCell style={style} vertex="1" parent="1">{geometry}</mxCell></UserObject>'
+        else:
+            yield f'<mxCell id={quoteattr("n" + key)} value={value} style={style} vertex="1" parent="1">' \
+                  f'{geometry}</mxCell>'
+    for index, (key, parent) in enumerate(parents.items()):
+        if parent in nodes and parent != key:
+            yield f'<mxCell id="e{index}" style="{EDGE_STYLE}" edge="1" parent="1" ' \
+                  f'source={quoteattr("n" + parent)} target={quoteattr("n" + key)}>' \
+                  f'<mxGeometry relative="1" as="geometry"/></mxCell>'
+    for index, (source, target) in enumerate(calls):
+        source, target = str(source), str(target)
+        if source in nodes and target in nodes:
+            yield f'<mxCell id="c{index}" style="{CALL_STYLE}" edge="1" parent="1" ' \
+                  f'source={quoteattr("n" + source)} target={quoteattr("n" + target)}>' \
+                  f'<mxGeometry relative="1" as="geometry"/></mxCell>'
+
+
+def graph_model(rows, links=None, calls=()):
+    yield '<mxGraphModel><root>'
+    yield from graph_cells(rows, links, calls)
+    yield '</root></mxGraphModel>'
+
+
+def compress(text):
+    # draw.io compressed diagrams: url encoded, raw deflate and base64
+    deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+    encoded = urllib.parse.quote(text, safe="~()*!.'")
+    return base64.b64encode(deflate.compress(encoded.encode()) + deflate.flush()).decode()
+
+
+def write_drawio(output, rows, compressed=False, name='Page-1', calls=()):
+    output.write('<mxfile host="xml2drawio">\n')
+    output.write(f'<diagram id={quoteattr(name)} name={quoteattr(name)}>')
+    if compressed:
+        output.write(compress(''.join(graph_model(rows, calls=calls))))
+    else:
+        output.write('\n')
+        for cell in graph_model(rows, calls=calls):
+            output.write(cell + '\n')
+    output.write('</diagram>\n</mxfile>\n')
+
+
+def page_xml(page_id, name, rows, compressed=False, links=None):
+    # one <diagram> page, pages do not depend on each other so they can be rendered in parallel
+    parts = [f'<diagram id={quoteattr(page_id)} name={quoteattr(name)}>']
+    if compressed:
+        parts.append(compress(''.join(graph_model(rows, links))))
+    else:
+        parts.append('\n')
+        parts.extend(cell + '\n' for cell in graph_model(rows, links))
+    parts.append('</diagram>\n')
+    return ''.join(parts)
+
+
+def index_page(names, compressed=False):
+    # a node per page grouped under the page name prefix (the camel context of route pages), linked to the page
+    rows = []
+    links = {}
+    groups = {}
+    for index, name in enumerate(names):
+        group, _, label = name.rpartition('/')
+        parent = ''
+        if group:
+            if group not in groups:
+                groups[group] = f'group{len(groups)}'
+                rows.append((groups[group], group, 'rect', ''))
+            parent = groups[group]
+        rows.append((f'page{index}', label, 'rect', parent))
+        links[f'page{index}'] = f'page-{index}'
+    return page_xml('index', 'Index', rows, compressed, links)
+
+
+def write_pages(output, pages, compressed=False, executor=None):
+    # pages is a list of (name, rows), written after an index page linking all of them
+    names = [name for name, _ in pages]
+    arguments = ([f'page-{index}' for index in range(len(pages))], names, [rows for _, rows in pages],
+                 [compressed] * len(pages))
+    rendered = executor.map(page_xml, *arguments) if executor else map(page_xml, *arguments)
+
+    output.write('<mxfile host="xml2drawio">\n')
+    output.write(index_page(names, compressed))
+    for page in rendered:
+        output.write(page)
+    output.write('</mxfile>\n')
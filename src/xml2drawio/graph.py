@@ -0,0 +1,68 @@
+import array
+
+# Compact in memory model of the emitted nodes. Instead of a tuple per node the columns are kept in parallel:
+# ids and parent ids are references to the same id objects, shapes are codes into a small table stored in an
+# array of unsigned shorts, and labels are interned so the repeated ones (processor names, endpoints) are
+# stored once. It reads as a sequence of (node id, label, shape, parent id) rows, so the writers, the
+# reduction passes, the route cache and the pages iterate, index and slice it like the list of rows it replaces.
+
+
+class Graph:
+    __slots__ = ('ids', 'labels', 'shapes', 'parents', 'shape_table', 'shape_codes', 'strings')
+
+    def __init__(self, rows=()):
+        self.ids = []
+        self.labels = []
+        self.shapes = array.array('H')
+        self.parents = []
+        self.shape_table = []
+        self.shape_codes = {}
+        self.strings = {}
+        self.extend(rows)
+
+    def add(self, node_id, label, shape, parent_id=''):
+        code = self.shape_codes.get(shape)
+        if code is None:
+            code = self.shape_codes[shape] = len(self.shape_table)
+            self.shape_table.append(shape)
+        self.ids.append(node_id)
+        self.labels.append(self.strings.setdefault(label, label))
+        self.shapes.append(code)
+        self.parents.append(parent_id)
+
+    def append(self, row):
+        self.add(*row)
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(*row)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return zip(self.ids, self.labels, map(self.shape_table.__getitem__, self.shapes), self.parents)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(self.ids[index], self.labels[index], map(self.shape_table.__getitem__, self.shapes[index]),
+                            self.parents[index]))
+        return self.ids[index], self.labels[index], self.shape_table[self.shapes[index]], self.parents[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, (Graph, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(row == other_row for row, other_row in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'Graph({list(self)!r})'
+
+    def nodes(self):
+        # (node id, label, shape) of every node
+        return list(zip(self.ids, self.labels, map(self.shape_table.__getitem__, self.shapes)))
+
+    def edges(self):
+        # (parent id, child id) of the route trees
+        return [(ref, node_id) for node_id, ref in zip(self.ids, self.parents) if ref != '']
@@ -0,0 +1,42 @@
+import contextlib
+import gzip
+import importlib.util
+import io
+import sys
+
+STDOUT = '-'
+
+
+@contextlib.contextmanager
+def open_output(path):
+    # text stream for a diagram written as it is produced: stdout for '-', gzip or zstandard compressed
+    # files by extension, otherwise a plain file
+    if path == STDOUT:
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    if path.endswith('.gz'):
+        output = gzip.open(path, 'wt', encoding='utf-8')
+    elif path.endswith('.zst'):
+        output = io.TextIOWrapper(zstd_writer(open(path, 'wb')), encoding='utf-8')
+    else:
+        output = open(path, 'w', encoding='utf-8')
+    with output:
+        yield output
+
+
+def zstd_writer(raw):
+    # zstandard package, or the compression.zstd module of python 3.14
+    try:
+        import zstandard
+        return zstandard.ZstdCompressor().stream_writer(raw)
+    except ImportError:
+        from compression import zstd
+        return zstd.ZstdFile(raw, 'wb')
+
+
+def unsupported(path):
+    # reason why the output cannot be written, checked before converting
+    if path.endswith('.zst') and not any(importlib.util.find_spec(name) for name in ('zstandard', 'compression')):
+        return '.zst output needs the zstandard package (pip install zstandard)'
+    return None
@@ -0,0 +1,57 @@
+import os
+import threading
+
+from lxml import etree
+
+CAMEL_NS = 'http://camel.apache.org/schema/spring'
+
+# elements never rendered, they are emptied as soon as they are parsed (kept in place so the positions
+# used by the hash ids do not change)
+SKIPPED_TAGS = (f'{{{CAMEL_NS}}}description', f'{{{CAMEL_NS}}}dataFormats')
+
+CHUNK_SIZE = 1024 * 1024
+
+# lxml parsers are reusable but not thread safe, every thread keeps its own
+local = threading.local()
+
+
+def shared_parser():
+    parser = getattr(local, 'parser', None)
+    if parser is None:
+        parser = local.parser = etree.XMLPullParser(
+            events=('end',), tag=SKIPPED_TAGS, remove_comments=True, remove_blank_text=True, huge_tree=True,
+            collect_ids=False)
+    return parser
+
+
+def parse(source):
+    # plain etree tree of a path, xml bytes or a file object, fed in chunks to the shared parser
+    parser = shared_parser()
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            feed(parser, bytes(source))
+            return parser.close()
+        if hasattr(source, 'read'):
+            return read(parser, source)
+        with open(source, 'rb') as xml_file:
+            root = read(parser, xml_file)
+        root.getroottree().docinfo.URL = os.fspath(source)
+        return root
+    except Exception:
+        # the parser state after an error is not reliable, the next parse gets a new one
+        local.parser = None
+        raise
+
+
+def read(parser, xml_file):
+    chunk = xml_file.read(CHUNK_SIZE)
+    while chunk:
+        feed(parser, chunk)
+        chunk = xml_file.read(CHUNK_SIZE)
+    return parser.close()
+
+
+def feed(parser, data):
+    parser.feed(data)
+    for _, element in parser.read_events():
+        element.clear(keep_tail=True)
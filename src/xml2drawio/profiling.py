@@ -0,0 +1,97 @@
+import contextlib
+import cProfile
+import functools
+import json
+import resource
+import time
+import tracemalloc
+
+from rich.table import Table
+
+
+class Profiler:
+    # Opt-in instrumentation of a conversion: wall time and calls of every handler, totals of the phases
+    # (parse, walk, uri rewriting, output...) and the peak memory. Handler times include the children
+    # converted inside the handler, with the iterative walker that is only the expressions of the node.
+    # With a pstats path the run is also wrapped in cProfile and tracemalloc.
+
+    def __init__(self, pstats_path=None):
+        self.pstats_path = pstats_path
+        self.handlers = {}
+        self.phases = {}
+        self.cprofile = None
+        self.traced_peak = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(self.phases, name, time.perf_counter() - start)
+
+    @staticmethod
+    def add(totals, name, seconds):
+        entry = totals.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def timed(self, totals, name, function):
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args):
+            start = perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.add(totals, name, perf_counter() - start)
+
+        return wrapper
+
+    def timed_handlers(self, handlers):
+        # a copy of a handler table where every handler records its time
+        return {tag: self.timed(self.handlers, handler.__name__, handler) for tag, handler in handlers.items()}
+
+    def start(self):
+        if self.pstats_path:
+            tracemalloc.start()
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.pstats_path)
+            self.traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.cprofile = None
+
+    def report(self):
+        report = {
+            'phases': {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in self.phases.items()},
+            'handlers': {name: {'calls': calls, 'seconds': seconds}
+                         for name, (calls, seconds) in sorted(self.handlers.items(), key=lambda item: -item[1][1])},
+            # kilobytes on linux
+            'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+        if self.traced_peak is not None:
+            report['traced_peak_bytes'] = self.traced_peak
+        return report
+
+    def write_json(self, path):
+        with open(path, "w") as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+    def table(self):
+        report = self.report()
+        table = Table(title=f"xml2drawio profile (peak rss {report['peak_rss']} kB)")
+        table.add_column("phase / handler")
+        table.add_column("calls", justify="right")
+        table.add_column("seconds", justify="right")
+        table.add_column("us per call", justify="right")
+        for section in ('phases', 'handlers'):
+            for name, entry in report[section].items():
+                table.add_row(name if section == 'phases' else f'  {name}', str(entry['calls']),
+                              f"{entry['seconds']:.4f}", f"{entry['seconds'] / entry['calls'] * 1e6:.1f}")
+        return table
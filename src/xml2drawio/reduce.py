@@ -0,0 +1,77 @@
+# Reduction passes over the emitted rows for diagrams too big to open, applied before writing:
+#   chains  consecutive sibling processors without children become one node with their count, except the
+#           children of choices, multicasts and recipient lists that are alternatives or parallel recipients
+#   routes  everything below the given depth is folded into its ancestor at that depth, labelled with the count
+#   prune   everything below the given depth is removed
+REDUCTIONS = ('none', 'chains', 'routes', 'prune')
+
+# the when and otherwise branches and the recipients are emitted directly under these nodes, their children
+# are not sequential steps
+BRANCHING_SHAPES = ('mxgraph.eip.content_based_router', 'mxgraph.eip.recipient_list')
+
+
+def parents(rows):
+    # index of the parent row of every row, None for the roots. Parents are emitted before their children
+    indexes = {}
+    result = []
+    for index, (node_id, _, _, ref) in enumerate(rows):
+        result.append(indexes.get(str(ref)) if ref != '' else None)
+        indexes.setdefault(str(node_id), index)
+    return result
+
+
+def chain_owners(rows, parent):
+    children = {}
+    for index, parent_index in enumerate(parent):
+        if parent_index is not None:
+            children.setdefault(parent_index, []).append(index)
+
+    owners = list(range(len(rows)))
+    labels = {}
+    for parent_index, kids in children.items():
+        if rows[parent_index][2] in BRANCHING_SHAPES:
+            continue
+        run = []
+        for kid in kids + [None]:
+            if kid is not None and kid not in children:
+                run.append(kid)
+                continue
+            if len(run) > 1:
+                first, last = run[0], run[-1]
+                labels[first] = f'{rows[first][1]} … {rows[last][1]} ({len(run)})'
+                for index in run:
+                    owners[index] = first
+            run = []
+    return owners, labels
+
+
+def depth_owners(rows, parent, depth, keep_count):
+    owners = []
+    depths = []
+    counts = {}
+    for index, parent_index in enumerate(parent):
+        level = 0 if parent_index is None else depths[parent_index] + 1
+        depths.append(level)
+        if level <= depth:
+            owners.append(index)
+        elif not keep_count:
+            owners.append(None)
+        else:
+            # the ancestor at depth, already resolved because parents come first
+            owner = parent_index if level == depth + 1 else owners[parent_index]
+            owners.append(owner)
+            counts[owner] = counts.get(owner, 0) + 1
+    return owners, {owner: f'{rows[owner][1]} (+{count})' for owner, count in counts.items()}
+
+
+def reduce_rows(rows, mode, depth=1):
+    # returns the reduced rows and, for every original row, the index of the original row now representing
+    # it (itself, the first node of its chain or its ancestor) or None when it was removed
+    parent = parents(rows)
+    if mode == 'chains':
+        owners, labels = chain_owners(rows, parent)
+    else:
+        owners, labels = depth_owners(rows, parent, depth, keep_count=mode == 'routes')
+    reduced = [(node_id, labels.get(index, label), shape, ref)
+               for index, (node_id, label, shape, ref) in enumerate(rows) if owners[index] == index]
+    return reduced, owners
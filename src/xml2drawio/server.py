@@ -0,0 +1,137 @@
+import collections
+import concurrent.futures
+import hashlib
+import http.server
+import os
+import threading
+import urllib.parse
+
+from lxml import etree
+
+from xml2drawio.xml2drawio import ID_STRATEGIES, OUTPUT_FORMATS, PAGE_MODES, UNKNOWN_MODES, convert, get_console
+
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'drawio': 'application/xml; charset=utf-8'}
+
+
+def convert_body(body, output_format='csv', id_strategy='uuid', compressed=False, pages='none', unknown='fail'):
+    # runs in a warm worker process, returns the http status and the response text. Imports are not
+    # followed, a request must not read files of the server
+    try:
+        diagram = convert(body, id_strategy=id_strategy, follow_imports=False, unknown=unknown)
+        return 200, diagram.render(output_format, compressed, pages)
+    except etree.XMLSyntaxError as e:
+        return 400, f'invalid xml: {e}\n'
+    except Exception as e:
+        return 422, f'conversion failed: {type(e).__name__}: {e}\n'
+
+
+def request_options(query):
+    # format, ids, compress, pages and unknown query parameters
+    params = urllib.parse.parse_qs(query)
+    options = {
+        'output_format': params.get('format', ['csv'])[0],
+        'id_strategy': params.get('ids', ['uuid'])[0],
+        'compressed': params.get('compress', ['0'])[0] in ('1', 'true'),
+        'pages': params.get('pages', ['none'])[0],
+        'unknown': params.get('unknown', ['fail'])[0],
+    }
+    if options['output_format'] not in OUTPUT_FORMATS or options['id_strategy'] not in ID_STRATEGIES \
+            or options['pages'] not in PAGE_MODES or options['unknown'] not in UNKNOWN_MODES or (options['pages'] != 'none' and options['output_format'] != 'drawio'):
+        return None
+    return options
+
+
+class ConversionHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self.reply(404, 'not found\n')
+        self.reply(200, 'ok\n')
+
+    def do_POST(self):
+        server = self.server
+        url = urllib.parse.urlsplit(self.path)
+        options = request_options(url.query)
+        if url.path != '/convert' or options is None:
+            return self.reply(400 if options is None else 404, 'POST /convert?format=csv|drawio&ids=...\n')
+
+        if self.headers.get('Content-Length') is None:
+            self.close_connection = True
+            return self.reply(411, 'Content-Length required\n')
+        try:
+            length = int(self.headers['Content-Length'])
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            return self.reply(400, 'invalid Content-Length\n')
+        if length > server.max_body:
+            self.close_connection = True
+            return self.reply(413, f'request body bigger than {server.max_body} bytes\n')
+        body = self.rfile.read(length)
+
+        # results are cached by the hash of the body and the options
+        key = hashlib.sha256(body + repr(sorted(options.items())).encode()).hexdigest()
+        with server.results_lock:
+            result = server.results.get(key)
+            if result is not None:
+                server.results.move_to_end(key)
+        if result is not None:
+            return self.reply(*result, options['output_format'], cache='hit')
+
+        if not server.slots.acquire(blocking=False):
+            return self.reply(503, 'too many conversions in progress\n')
+        try:
+            result = server.executor.submit(convert_body, body, **options).result()
+        finally:
+            server.slots.release()
+
+        with server.results_lock:
+            server.results[key] = result
+            while len(server.results) > server.cache_size:
+                server.results.popitem(last=False)
+        self.reply(*result, options['output_format'], cache='miss')
+
+    def reply(self, status, text, output_format=None, cache=None):
+        payload = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', CONTENT_TYPES.get(output_format, 'text/plain; charset=utf-8')
+                         if status == 200 else 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if cache:
+            self.send_header('X-Cache', cache)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            get_console().log(self.address_string(), format % args)
+
+
+def make_server(host='127.0.0.1', port=8080, workers=None, max_body=10 * 1024 * 1024, max_concurrent=None,
+                cache_size=256, verbose=True):
+    workers = workers or os.cpu_count() or 1
+    server = http.server.ThreadingHTTPServer((host, port), ConversionHandler)
+    server.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    server.max_body = max_body
+    # requests beyond the cap are rejected instead of queued
+    server.slots = threading.BoundedSemaphore(max_concurrent or workers * 2)
+    server.results = collections.OrderedDict()
+    server.results_lock = threading.Lock()
+    server.cache_size = cache_size
+    server.verbose = verbose
+    # start the worker processes now so the first requests do not pay for it
+    list(server.executor.map(int, range(workers)))
+    return server
+
+
+def serve(host='127.0.0.1', port=8080, **options):
+    server = make_server(host, port, **options)
+    get_console().log("serving on", f'http://{host}:{server.server_address[1]}/convert')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.executor.shutdown()
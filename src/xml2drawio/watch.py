@@ -0,0 +1,77 @@
+import os
+import time
+
+from xml2drawio.batch import output_name
+from xml2drawio.xml2drawio import SUMMARY
+
+
+def modification_times(paths):
+    times = {}
+    for path in paths:
+        try:
+            times[path] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            times[path] = None
+    return times
+
+
+def write_atomic(path, text):
+    # the diagram is replaced in one step, an editor reloading it never sees a partial file
+    temporary = path + '.tmp'
+    with open(temporary, "w") as output:
+        output.write(text)
+    os.replace(temporary, path)
+
+
+def watch(converter, xml_path, output_dir='.', stream=False, output_format='csv', compressed=False, pages='none',
+          workers=None, debounce=0.2, interval=0.1, max_renders=None):
+    # Converts xml_path and converts it again every time it or one of its imported files changes. The process
+    # stays alive, so only the routes that changed are walked again (route cache) and the imported files that
+    # did not change are not parsed again (document cache). Changes closer than debounce seconds are
+    # coalesced in a single conversion.
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, output_name(xml_path, set(), '.' + output_format))
+    renders = 0
+    while True:
+        start = time.perf_counter()
+        # taken before converting so a save during the conversion triggers the next one
+        times = modification_times([xml_path])
+        current = converter.fresh()
+        try:
+            current.convert_file(xml_path, stream=stream)
+            write_atomic(output_path, current.render(output_format, compressed, pages, workers))
+            if current.cache is not None:
+                current.cache.flush()
+            if converter.verbosity >= SUMMARY:
+                converter.log("rendered", output=output_path, seconds=round(time.perf_counter() - start, 3),
+                              cached_routes=current.cache.hits if current.cache else 0)
+        except Exception as e:
+            # a file saved in the middle of an edit is not valid xml yet, wait for the next change
+            converter.log("conversion failed", error=f'{type(e).__name__}: {e}')
+        if current.cache is not None:
+            current.cache.hits = current.cache.misses = 0
+
+        renders += 1
+        if max_renders is not None and renders >= max_renders:
+            return renders
+
+        watched = [xml_path, *current.loaded_documents]
+        times.update(modification_times(current.loaded_documents))
+        try:
+            wait_for_change(watched, times, debounce, interval)
+        except KeyboardInterrupt:
+            return renders
+
+
+def wait_for_change(watched, times, debounce, interval):
+    # polls the files until one changes and then until none changed for debounce seconds
+    while modification_times(watched) == times:
+        time.sleep(interval)
+    last_change = time.monotonic()
+    times = modification_times(watched)
+    while time.monotonic() - last_change < debounce:
+        time.sleep(interval)
+        current = modification_times(watched)
+        if current != times:
+            times = current
+            last_change = time.monotonic()
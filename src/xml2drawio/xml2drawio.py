@@ -1,19 +1,179 @@
-import configargparse
-from lxml import etree, objectify
-from rich import console
-from rich.console import Console
-import importlib.metadata
+from xml2drawio import documents, parsing, reduce, version
+from xml2drawio.graph import Graph
+import bisect
+import collections
+import contextlib
+import functools
+import hashlib
+import itertools
+import os
+import csv
+import io
+from lxml import etree
+import json
 import re
 import sys
+import time
 import uuid
 
-__version__ = importlib.metadata.version('camel-xml2drawio')
+# rich, configargparse, the route cache and the writers are imported when they are first used, so short
+# runs, --help and --version do not pay for them
 ns = {
     "camel": "http://camel.apache.org/schema/spring",
     "beans": "http://www.springframework.org/schema/beans"
 }
+CAMEL_CONTEXT_TAG = f'{{{ns["camel"]}}}camelContext'
+ROUTE_TAG = f'{{{ns["camel"]}}}route'
+BEAN_TAG = f'{{{ns["camel"]}}}bean'
 
-console = Console()
+
+
+@functools.lru_cache(maxsize=None)
+def get_console():
+    from rich.console import Console
+    # messages go to stderr, stdout only has the diagram
+    return Console(stderr=True)
+
+
+def __getattr__(name):
+    # __version__ and console are created on first use
+    if name == '__version__':
+        return version()
+    if name == 'console':
+        return get_console()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# verbosity levels, per node messages are only produced in debug
+SILENT = 0
+SUMMARY = 1
+DEBUG = 2
+VERBOSITY_LEVELS = {'silent': SILENT, 'summary': SUMMARY, 'debug': DEBUG}
+
+# node identifiers: random uuids, sequential integers or a stable hash of context, route and xpath
+ID_STRATEGIES = ('uuid', 'sequential', 'hash')
+
+# csv text for the draw io csv import or a native .drawio file with the layout already done
+OUTPUT_FORMATS = ('csv', 'drawio')
+
+# drawio output with one page per route or per camel context and an index page
+PAGE_MODES = ('none', 'route', 'context')
+
+# plain etree trees from a shared tuned parser that empties the elements never rendered, or lxml objectify
+PARSERS = ('etree', 'objectify')
+
+# tree walk with an explicit stack (any nesting depth) or with python recursion
+WALKERS = ('iterative', 'recursive')
+
+# elements without a handler stop the conversion, are drawn with a generic shape or are skipped (their
+# children are still converted). The last two keep going and collect the unknown tags in a report
+UNKNOWN_MODES = ('fail', 'generic', 'skip')
+UNKNOWN_SHAPE = 'mxgraph.eip.message_translator'
+
+
+class UnknownElementError(Exception):
+    # raised in fail mode, the command line turns it into exit status 1
+
+    def __init__(self, name, line):
+        super().__init__(f'no handler for {name} (line {line})')
+        self.name = name
+        self.line = line
+
+
+def property_reference(match):
+    # ${name} property references become {{name}}, exchange properties and headers are kept
+    reference = match.group(0)
+    if 'exchangeProperty' in reference or 'headers' in reference:
+        return reference
+    return '{' + match.group(1) + '}'
+
+
+# camel deprecated syntax rewrites applied in order to every endpoint uri, compiled once
+DEPRECATED_RULES = (
+    (re.compile(r'\${property\.(\w+\.?\w+)}'), r'${exchangeProperty.\1}'),  # exchange property in simple expressions
+    (re.compile(r'\${header\.(\w+\.?\w+)}'), r'${headers.\1}'),
+    (re.compile('"'), "'"),  # replace all occurrences from " to '
+    (re.compile('\n'), ""),  # remove all endlines
+    (re.compile(r"\$(\{[\w\.\_]+\})"), property_reference),  # convert all property references
+)
+
+# endpoints whose producers are linked to the route consuming them, True for the ones local to a camel context
+LINKED_SCHEMES = {'direct': True, 'seda': True, 'vm': False, 'direct-vm': False}
+
+
+def linked_endpoint(uri):
+    # scheme:name of direct, seda, vm and direct-vm uris (options removed), None for the other components
+    scheme, _, rest = uri.partition(':')
+    if scheme not in LINKED_SCHEMES:
+        return None
+    return f'{scheme}:{rest.partition("?")[0].lstrip("/")}'
+
+
+# the same uris repeat across routes, rewrites are memoized up to this number of distinct uris
+URI_CACHE_SIZE = 4096
+
+
+class Diagram:
+    # Result of a conversion: rows are (node id, label, shape, parent id) in document order, links are the
+    # (caller node id, route root id) pairs between routes and sections the (context, route scope, first row)
+    # of every top level element of the camel contexts
+
+    def __init__(self, rows, links=(), sections=(), unknown=None):
+        self.rows = rows
+        self.links = list(links)
+        self.sections = list(sections)
+        self.unknown = unknown or {}
+
+    @property
+    def nodes(self):
+        if isinstance(self.rows, Graph):
+            return self.rows.nodes()
+        return [(node_id, label, shape) for node_id, label, shape, _ in self.rows]
+
+    @property
+    def edges(self):
+        # (parent id, child id) of the route trees
+        if isinstance(self.rows, Graph):
+            return self.rows.edges()
+        return [(ref, node_id) for node_id, _, _, ref in self.rows if ref != '']
+
+    def as_dict(self):
+        # json friendly, ids as strings
+        return {
+            'nodes': [{'id': str(node_id), 'label': label, 'shape': shape} for node_id, label, shape in self.nodes],
+            'edges': [[str(source), str(target)] for source, target in self.edges],
+            'links': [[str(source), str(target)] for source, target in self.links],
+            'unknown': self.unknown,
+        }
+
+    def write(self, output, output_format='csv', compressed=False, pages='none', workers=None):
+        # written piece by piece to the output stream, the whole diagram text is never built
+        if pages == 'none':
+            Converter.write_diagram(output, self.rows, output_format, compressed, self.links)
+            return
+        from xml2drawio import drawio
+        if workers and workers > 1:
+            import concurrent.futures
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                drawio.write_pages(output, self.pages(pages), compressed, executor)
+        else:
+            drawio.write_pages(output, self.pages(pages), compressed)
+
+    def render(self, output_format='csv', compressed=False, pages='none', workers=None):
+        output = io.StringIO()
+        self.write(output, output_format, compressed, pages, workers)
+        return output.getvalue()
+
+    def pages(self, by='route'):
+        # rows grouped by the route or camel context that produced them, in document order. Route pages
+        # are named context/label of the route root (route id or from uri)
+        pages = {}
+        ends = [start for _, _, start in self.sections[1:]] + [len(self.rows)]
+        for (context, scope, start), end in zip(self.sections, ends):
+            if start < end:
+                pages.setdefault(context if by == 'context' else scope, []).extend(self.rows[start:end])
+        if by == 'context':
+            return list(pages.items())
+        return [(f'{scope.partition("/")[0]}/{rows[0][1]}', rows) for scope, rows in pages.items()]
 
 
 class Converter:
@@ -38,73 +198,672 @@ id,component,shape,refs
 >>> routes <<<
     '''
 
-    def __init__(self):
-        self.dsl_route = ''
+    def __init__(self, cache=None, verbosity=SUMMARY, events=None, id_strategy='uuid', walker='iterative',
+                 follow_imports=True, import_paths=(), document_cache=None, unknown='fail', reduction='none',
+                 reduce_depth=1, profiler=None, parser='etree', route_workers=None):
+        self.rows = Graph()
+        self.cache = cache
+        self.verbosity = verbosity
+        self.events = events
+        self.id_strategy = id_strategy
+        self.new_id = getattr(self, id_strategy + '_id')
+        self.id_counter = itertools.count(1)
+        self.context_scope = ''
+        self.scope = ''
+        self.scope_paths = {}
+        self.context_children = 0
+        self.sections = []
+        self.iterative = walker == 'iterative'
+        self.pending = []
+        self.follow_imports = follow_imports
+        self.import_paths = import_paths
+        self.documents = document_cache or documents.DOCUMENTS
+        self.loaded_documents = set()
         self.endpoints = {}
         self.bean_refs = {}
+        self.unknown = unknown
+        self.unknown_nodes = {}
+        self.endpoint_refs = []
+        self.reduction = reduction
+        self.reduce_depth = reduce_depth
+        self.parser = parser
+        self.route_workers = route_workers
+        self.profiler = profiler
+        if profiler is not None:
+            self.instrument()
 
     def xml_to_drawio(self):
-        p = configargparse.ArgParser(
-            description="Transforms xml routes to eip draw io diagram " + __version__)
-        p.add_argument('--xml', metavar='xml', type=str, help='xml camel context file', required=True, env_var='XML_CTX_INPUT')
-        
+        # the parser is built without reading the package metadata or importing the route cache, so --help is
+        # answered with configargparse as the only extra import
+        import configargparse
+        p = configargparse.ArgParser(description="Transforms xml routes to eip draw io diagram")
+        p.add_argument('--version', action='store_true', help="show program's version number and exit")
+        source = p.add_mutually_exclusive_group(required=True)
+        source.add_argument('--xml', metavar='xml', type=str, help='xml camel context file', env_var='XML_CTX_INPUT')
+        source.add_argument('--batch', metavar='batch', type=str,
+                            help='directory, glob pattern or manifest file (one path per line) of xml files',
+                            env_var='XML_CTX_BATCH')
+        source.add_argument('--serve', action='store_true',
+                            help='run a local http conversion service (POST xml to /convert)', env_var='XML_CTX_SERVE')
+        p.add_argument('--stream', action='store_true', help='stream the xml file route by route (low memory)', env_var='XML_CTX_STREAM')
+        p.add_argument('--workers', metavar='workers', type=int, default=None,
+                       help='number of worker processes for batch mode (default: cpu count)', env_var='XML_CTX_WORKERS')
+        p.add_argument('--output-dir', metavar='output_dir', type=str, default='.',
+                       help='directory where batch mode writes one diagram per input file', env_var='XML_CTX_OUTPUT_DIR')
+        p.add_argument('--merge', metavar='merge', type=str, default=None,
+                       help='write a single merged diagram with all the batch files to this file', env_var='XML_CTX_MERGE')
+        p.add_argument('--no-cache', action='store_true', help='do not use the converted routes cache', env_var='XML_CTX_NO_CACHE')
+        p.add_argument('--cache-dir', metavar='cache_dir', type=str, default=None,
+                       help='converted routes cache directory (default: ~/.cache/xml2drawio)', env_var='XML_CTX_CACHE_DIR')
+        p.add_argument('--verbosity', choices=VERBOSITY_LEVELS.keys(), default='summary',
+                       help='silent, summary or debug (one message per node)', env_var='XML_CTX_VERBOSITY')
+        p.add_argument('--events', metavar='events', type=str, default=None,
+                       help='write progress events as json lines to this file instead of the terminal', env_var='XML_CTX_EVENTS')
+        p.add_argument('--ids', choices=ID_STRATEGIES, default='uuid',
+                       help='node identifiers: uuid, sequential or hash (reproducible output)', env_var='XML_CTX_IDS')
+        p.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                       help='csv import text or native .drawio file', env_var='XML_CTX_FORMAT')
+        p.add_argument('--compress', action='store_true',
+                       help='write compressed diagram payloads in drawio format', env_var='XML_CTX_COMPRESS')
+        p.add_argument('--walker', choices=WALKERS, default='iterative',
+                       help='walk the xml with an explicit stack or with recursion', env_var='XML_CTX_WALKER')
+        p.add_argument('--no-imports', action='store_true',
+                       help='do not follow spring <import resource=...> elements', env_var='XML_CTX_NO_IMPORTS')
+        p.add_argument('--import-path', metavar='import_path', action='append', default=[],
+                       help='directory where imported classpath resources are searched (repeatable)')
+        p.add_argument('--unknown', choices=UNKNOWN_MODES, default='fail',
+                       help='elements without a handler: stop, draw a generic shape or skip them', env_var='XML_CTX_UNKNOWN')
+        p.add_argument('--unknown-report', metavar='unknown_report', type=str, default=None,
+                       help='write the unknown elements with their counts and source lines to this json file',
+                       env_var='XML_CTX_UNKNOWN_REPORT')
+        p.add_argument('--reduce', choices=reduce.REDUCTIONS, default='none',
+                       help='for very big diagrams: collapse chains of processors, collapse routes below '
+                            '--reduce-depth or prune the nodes below it', env_var='XML_CTX_REDUCE')
+        p.add_argument('--reduce-depth', metavar='reduce_depth', type=int, default=1,
+                       help='depth kept by --reduce routes and prune (0: route roots only)', env_var='XML_CTX_REDUCE_DEPTH')
+        p.add_argument('--profile', action='store_true',
+                       help='print the time of every handler and phase and the peak memory', env_var='XML_CTX_PROFILE')
+        p.add_argument('--profile-json', metavar='profile_json', type=str, default=None,
+                       help='write the profile as json to this file', env_var='XML_CTX_PROFILE_JSON')
+        p.add_argument('--pstats', metavar='pstats', type=str, default=None,
+                       help='run under cProfile and tracemalloc and save the pstats to this file', env_var='XML_CTX_PSTATS')
+        p.add_argument('--parser', choices=PARSERS, default='etree',
+                       help='plain etree with a shared tuned parser or lxml objectify', env_var='XML_CTX_PARSER')
+        p.add_argument('--route-workers', metavar='route_workers', type=int, default=None,
+                       help='convert the routes of each camel context in parallel on this number of processes',
+                       env_var='XML_CTX_ROUTE_WORKERS')
+        p.add_argument('--output', metavar='output', type=str, default='-',
+                       help='file where the diagram is written (default: stdout), compressed when it ends in .gz or .zst',
+                       env_var='XML_CTX_OUTPUT')
+        p.add_argument('--pages', choices=PAGE_MODES, default='none',
+                       help='drawio format: one page per route or per camel context', env_var='XML_CTX_PAGES')
+        p.add_argument('--watch', action='store_true',
+                       help='convert again when the xml or its imports change, the diagram is written to --output-dir',
+                       env_var='XML_CTX_WATCH')
+        p.add_argument('--debounce', metavar='debounce', type=float, default=0.2,
+                       help='watch mode: seconds without changes before converting again', env_var='XML_CTX_DEBOUNCE')
+        p.add_argument('--host', metavar='host', type=str, default='127.0.0.1',
+                       help='serve mode: address to listen on', env_var='XML_CTX_HOST')
+        p.add_argument('--port', metavar='port', type=int, default=8080,
+                       help='serve mode: port to listen on', env_var='XML_CTX_PORT')
+        p.add_argument('--max-body', metavar='max_body', type=int, default=10 * 1024 * 1024,
+                       help='serve mode: biggest accepted request in bytes', env_var='XML_CTX_MAX_BODY')
+        p.add_argument('--max-concurrent', metavar='max_concurrent', type=int, default=None,
+                       help='serve mode: conversions in progress before rejecting requests (default: 2 x workers)',
+                       env_var='XML_CTX_MAX_CONCURRENT')
+
         args = p.parse_args()
-        with open(args.xml, "r") as xml_file:
-            parser = etree.XMLParser(remove_comments=True)
-            data = objectify.parse(xml_file, parser=parser)
-            console.log(" XML 2 Draw IO Utility ", style="bold red")
-            root = data.getroot()
+        if args.version:
+            print(version())
+            return
+        if args.pages != 'none' and args.format != 'drawio':
+            p.error('--pages needs --format drawio')
+        from xml2drawio import output
+        if output.unsupported(args.output):
+            p.error(output.unsupported(args.output))
+        self.verbosity = VERBOSITY_LEVELS[args.verbosity]
+        self.id_strategy = args.ids
+        self.iterative = args.walker == 'iterative'
+        self.follow_imports = not args.no_imports
+        self.import_paths = args.import_path
+        self.new_id = getattr(self, args.ids + '_id')
+        self.unknown = args.unknown
+        self.reduction = args.reduce
+        self.reduce_depth = args.reduce_depth
+        self.parser = args.parser
+        self.route_workers = args.route_workers
+        if args.profile or args.profile_json or args.pstats:
+            from xml2drawio import profiling
+            self.profiler = profiling.Profiler(args.pstats)
+            self.instrument()
+            self.profiler.start()
+        if args.events:
+            self.events = open(args.events, "a", buffering=1)
+        if self.verbosity >= SUMMARY:
+            self.log(" XML 2 Draw IO Utility ", style="bold red", version=version())
+        if args.serve:
+            from xml2drawio import server
+            server.serve(args.host, args.port, workers=args.workers, max_body=args.max_body,
+                         max_concurrent=args.max_concurrent, verbose=self.verbosity >= SUMMARY)
+            return
+
+        from xml2drawio import cache
+        cache_dir = None if args.no_cache else args.cache_dir or cache.default_cache_dir()
+        if args.batch:
+            from xml2drawio import batch
+            sys.exit(batch.run_batch(args.batch, workers=args.workers, output_dir=args.output_dir,
+                                     merge=args.merge, stream=args.stream, cache_dir=cache_dir,
+                                     verbosity=self.verbosity, events_path=args.events, id_strategy=args.ids,
+                                     output_format=args.format, compressed=args.compress, walker=args.walker,
+                                     follow_imports=not args.no_imports, import_paths=args.import_path,
+                                     unknown=args.unknown, unknown_report=args.unknown_report,
+                                     reduction=args.reduce, reduce_depth=args.reduce_depth, parser=args.parser))
+
+        if cache_dir or args.watch:
+            # watch mode without the disk cache keeps the converted routes in memory
+            self.cache = cache.RouteCache(cache_dir, in_memory=not cache_dir)
+        try:
+            if args.watch:
+                from xml2drawio import watch
+                watch.watch(self, args.xml, args.output_dir, stream=args.stream, output_format=args.format,
+                            compressed=args.compress, pages=args.pages, workers=args.workers, debounce=args.debounce)
+                return
+            self.convert_file(args.xml, stream=args.stream)
+        finally:
+            if self.cache:
+                self.cache.close()
+        if args.unknown_report:
+            with open(args.unknown_report, "w") as report_file:
+                json.dump(self.unknown_report(), report_file, indent=2)
+        with self.phase('output'), output.open_output(args.output) as output_file:
+            self.result().write(output_file, args.format, args.compress, args.pages, args.workers)
+        if self.profiler is not None:
+            self.profiler.stop()
+            if args.profile_json:
+                self.profiler.write_json(args.profile_json)
+            if args.profile or args.pstats:
+                get_console().print(self.profiler.table())
+
+    def render(self, output_format='csv', compressed=False, pages='none', workers=None):
+        return self.result().render(output_format, compressed, pages, workers)
+
+    def convert(self, source):
+        # converts a path, xml bytes, a file object or an already parsed lxml tree or element
+        with self.phase('parse'):
+            root = self.parse_source(source)
+        with self.phase('walk'):
+            self.walk(root)
+        with self.phase('reduce'):
+            self.reduce(self.reduction, self.reduce_depth)
+        return self.result()
+
+    def fresh(self):
+        # a new converter with the same options and caches, used for converting again
+        return type(self)(cache=self.cache, verbosity=self.verbosity, events=self.events, id_strategy=self.id_strategy,
+                          walker='iterative' if self.iterative else 'recursive', follow_imports=self.follow_imports,
+                          import_paths=self.import_paths, document_cache=self.documents, unknown=self.unknown,
+                          reduction=self.reduction, reduce_depth=self.reduce_depth, profiler=self.profiler,
+                          parser=self.parser, route_workers=self.route_workers)
+
+    def convert_file(self, xml_path, stream=False):
+        start = time.perf_counter()
+        if stream:
+            with self.phase('stream (parse and walk)'):
+                self.stream_xml(xml_path)
+        else:
+            self.load_xml(xml_path)
+        with self.phase('reduce'):
+            self.reduce(self.reduction, self.reduce_depth)
+        if self.verbosity >= SUMMARY:
+            uri_cache = Converter.deprecatedProcessor.cache_info()
+            self.log("converted", file=xml_path, rows=len(self.rows), seconds=round(time.perf_counter() - start, 3),
+                     uri_cache_hits=uri_cache.hits, uri_cache_misses=uri_cache.misses)
+            for node, lines in self.unknown_nodes.items():
+                self.log("unknown node", style="yellow", node=node, count=len(lines), lines=lines)
+        return self.rows
+
+    def reduce(self, mode, depth=1):
+        # replaces the rows with the reduced ones, the route sections and linked endpoints follow the rows
+        # that now represent their nodes
+        if mode == 'none':
+            return
+        nodes = len(self.rows)
+        rows, owners = reduce.reduce_rows(self.rows, mode, depth)
+        self.rows = Graph(rows)
+        kept = [index for index, owner in enumerate(owners) if owner == index]
+        positions = {index: position for position, index in enumerate(kept)}
+        self.sections = [(context, scope, bisect.bisect_left(kept, start)) for context, scope, start in self.sections]
+        self.endpoint_refs = [(positions[owners[index]], consumer, context, endpoint)
+                              for index, consumer, context, endpoint in self.endpoint_refs if owners[index] is not None]
+        if self.verbosity >= SUMMARY:
+            self.log("reduced", mode=mode, nodes_before=nodes, nodes_after=len(self.rows))
+
+    def unknown_report(self):
+        # {local name: {'count': n, 'lines': [source lines]}} of the elements without a handler
+        return {node: {'count': len(lines), 'lines': lines} for node, lines in sorted(self.unknown_nodes.items())}
+
+    def log(self, event, style=None, **fields):
+        # progress events go to the events file as json lines when one is given, otherwise to the terminal.
+        # Callers check self.verbosity first so disabled messages cost only the comparison
+        if self.events is not None:
+            self.events.write(json.dumps({'time': time.time(), 'event': event, **fields}, default=str) + '\n')
+        else:
+            get_console().log(event, *fields.values(), style=style, _stack_offset=2)
+
+    def result(self):
+        return Diagram(self.rows, self.route_links(), self.sections, self.unknown_report())
+
+    def diagram(self, output_format='csv', compressed=False):
+        return self.result().render(output_format, compressed)
 
-            # Camel Contexts
-            for idx, camelContext in enumerate(root.findall('camel:camelContext', ns)):
-                if 'id' in camelContext.attrib:
-                    console.log("processing camel context", camelContext.attrib['id'])
+    def paged_diagram(self, by='route', compressed=False, workers=None):
+        return self.result().render('drawio', compressed, by, workers)
 
-                class_name = camelContext.attrib['id'] if 'id' in camelContext.attrib else f'camelContext{str(idx)}'
-                class_name = class_name.capitalize()
-                context_id = uuid.uuid4()
-                self.get_namespaces(camelContext)
-                self.dsl_route += self.analyze_node(camelContext, context_id)
+    def pages(self, by='route'):
+        return self.result().pages(by)
 
-            dsl_route = Converter.DIAGRAM_TEMPLATE \
-                .replace(">>> routes <<<", self.dsl_route)
+    def link_endpoint(self, uri, consumer):
+        # called before emitting the from, to... row of the uri, the row index identifies the node
+        endpoint = linked_endpoint(uri)
+        if endpoint is not None:
+            self.endpoint_refs.append((len(self.rows), consumer, self.context_scope, endpoint))
 
-            print("draw io diagram:\n", dsl_route)
+    def route_links(self):
+        # (producer node id, consuming route root id) pairs, the consumers are indexed by endpoint in one
+        # pass and the producers resolved against the index in another
+        def key(context, endpoint):
+            return context if LINKED_SCHEMES[endpoint.partition(':')[0]] else '', endpoint
+
+        ids = self.rows.ids
+        consumers = {}
+        for index, consumer, context, endpoint in self.endpoint_refs:
+            if consumer:
+                consumers.setdefault(key(context, endpoint), ids[index])
+        return [(ids[index], consumers[key(context, endpoint)])
+                for index, consumer, context, endpoint in self.endpoint_refs
+                if not consumer and key(context, endpoint) in consumers]
 
     @staticmethod
-    def get_namespaces(node):
-        console.log("namespaces:", node.nsmap)
+    def write_diagram(output, rows, output_format='csv', compressed=False, links=()):
+        if output_format == 'drawio':
+            from xml2drawio import drawio
+            drawio.write_drawio(output, rows, compressed=compressed, calls=links)
+            return
+
+        # rows are written once through csv.writer, labels with commas or quotes are escaped. The callers
+        # of a route are added to the refs of its root, the csv import accepts a list of refs
+        callers = {}
+        for source, target in links:
+            callers.setdefault(str(target), []).append(str(source))
+        if callers:
+            rows = ((node_id, label, shape, ','.join(filter(None, [str(ref), *callers.get(str(node_id), ())])))
+                    for node_id, label, shape, ref in rows)
+        header, _, footer = Converter.DIAGRAM_TEMPLATE.partition(">>> routes <<<")
+        output.write(header)
+        csv.writer(output, lineterminator='\n').writerows(rows)
+        output.write(footer)
+
+    def emit(self, node_id, label, shape, parent_id=''):
+        self.rows.add(node_id, label, shape, parent_id)
+
+    def load_xml(self, xml_path):
+        with self.phase('parse'):
+            root = self.parse_xml(xml_path)
+        with self.phase('walk'):
+            self.walk(root)
+
+    def parse_source(self, source):
+        if isinstance(source, etree._ElementTree):
+            return source.getroot()
+        if isinstance(source, etree._Element):
+            return source
+        if self.parser == 'etree':
+            return parsing.parse(source)
+        if isinstance(source, (bytes, bytearray)):
+            return etree.fromstring(bytes(source), etree.XMLParser(remove_comments=True))
+        if hasattr(source, 'read'):
+            return etree.parse(source, etree.XMLParser(remove_comments=True)).getroot()
+        return self.parse_xml(source)
+
+    def phase(self, name):
+        return self.profiler.phase(name) if self.profiler is not None else contextlib.nullcontext()
+
+    def instrument(self):
+        # timed copies of the handler table and of the uri rewrites, used by this converter only
+        profiler = self.profiler
+        self.handlers = profiler.timed_handlers(type(self).handlers)
+        self.deprecatedProcessor = profiler.timed(profiler.phases, 'uri rewriting', type(self).deprecatedProcessor)
+        self.componentOptions = profiler.timed(profiler.phases, 'uri rewriting', type(self).componentOptions)
+
+    def parse_xml(self, xml_path):
+        if self.parser == 'etree':
+            return parsing.parse(xml_path)
+        with open(xml_path, "r") as xml_file:
+            from lxml import objectify
+            parser = etree.XMLParser(remove_comments=True)
+            data = objectify.parse(xml_file, parser=parser)
+            return data.getroot()
 
-    def analyze_node(self, node, parent_id):
-        dsl_text = ""
-        for child in node:
-            node_name = child.tag.partition('}')[2]
+    def walk(self, root):
+        self.add_document(documents.index_document(root), root.getroottree().docinfo.URL)
 
-            # Skip property placeholders
-            if node_name == 'propertyPlaceholder':
+        # Camel Contexts
+        for idx, camelContext in enumerate(root.findall('camel:camelContext', ns)):
+            context_id = self.start_context(camelContext, idx)
+            if self.route_workers and self.route_workers > 1:
+                self.walk_sharded(camelContext, context_id)
+                continue
+            for child in camelContext.iterchildren(etree.Element):
+                self.analyze_context_child(child, context_id)
+
+    def stream_xml(self, xml_path):
+        # Walks the file with iterparse, every top level element of a camel context (routes, endpoints...)
+        # is converted as soon as its end tag is seen and then released, so the memory used depends on
+        # the biggest route and not on the size of the whole file
+        # the endpoint and bean ids of the whole file are needed by its first route, they are read first
+        # without building the tree
+        self.add_document(documents.scan_document(xml_path), xml_path)
+        depth = 0
+        idx = 0
+        context_id = None
+        # same limits as the tree parser: no maximum nesting depth or text node size
+        for event, elem in etree.iterparse(xml_path, events=('start', 'end'), remove_comments=True,
+                                           remove_blank_text=True, huge_tree=True):
+            if event == 'start':
+                if depth == 1 and elem.tag == CAMEL_CONTEXT_TAG:
+                    context_id = self.start_context(elem, idx)
+                    idx += 1
+                depth += 1
+                continue
+
+            depth -= 1
+            parent = elem.getparent()
+            if depth == 2 and parent.tag == CAMEL_CONTEXT_TAG:
+                self.analyze_context_child(elem, context_id)
+            if depth in (1, 2):
+                # release the processed subtree and the already processed siblings
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+    def add_document(self, document, xml_path):
+        # endpoint and bean ids of the converted file, after the ones of its imports so its own win
+        if self.follow_imports:
+            self.resolve_imports(document.imports, xml_path)
+        self.endpoints.update(document.endpoints)
+        self.bean_refs.update(document.beans)
+
+    def resolve_imports(self, imports, xml_path):
+        # endpoint and bean ids of the imported spring files (and their imports) are added to the indexes
+        base_dir = os.path.dirname(xml_path) if xml_path else os.getcwd()
+        imported, missing = self.documents.imported(imports, base_dir, self.import_paths, self.loaded_documents)
+        for document in imported:
+            self.endpoints.update(document.endpoints)
+            self.bean_refs.update(document.beans)
+            if self.verbosity >= SUMMARY:
+                self.log("imported", file=document.path, endpoints=len(document.endpoints), beans=len(document.beans))
+        for resource in missing:
+            if self.verbosity >= SUMMARY:
+                self.log("import not found", resource=resource, base_dir=base_dir)
+
+    def start_context(self, camelContext, idx):
+        if 'id' in camelContext.attrib and self.verbosity >= SUMMARY:
+            self.log("processing camel context", context=camelContext.attrib['id'])
+
+        class_name = camelContext.attrib['id'] if 'id' in camelContext.attrib else f'camelContext{str(idx)}'
+        class_name = class_name.capitalize()
+        self.context_scope = self.scope = camelContext.attrib.get('id', f'camelContext{idx}')
+        self.scope_paths = {camelContext: ''}
+        self.context_children = 0
+        context_id = self.new_id(camelContext)
+        self.get_namespaces(camelContext)
+        return context_id
+
+    def uuid_id(self, node):
+        return uuid.uuid4()
+
+    def sequential_id(self, node):
+        return next(self.id_counter)
+
+    def hash_id(self, node):
+        # xpath relative to the current context or route, so the ids do not depend on the elements
+        # before it (streaming mode releases them)
+        return hashlib.sha1(f'{self.scope}{self.scope_path(node)}'.encode()).hexdigest()[:16]
+
+    def scope_path(self, node):
+        # the path getpath would give below the scope element, built from the paths of the ancestors. The
+        # steps of all the children of a parent are computed in one pass, getpath scans the siblings of every
+        # node and is quadratic in the width of a route
+        paths = self.scope_paths
+        chain = [node]
+        while chain[-1] not in paths:
+            parent = chain[-1].getparent()
+            if parent is None:
+                # not below the scope element, relative to the document root
+                paths[chain[-1]] = ''
+                break
+            chain.append(parent)
+        for parent in reversed(chain[1:]):
+            paths.update((child, paths[parent] + step) for child, step in path_steps(parent))
+        return paths[node]
+
+    def child_scope(self, child, position):
+        # routes and other top level elements of a context are identified by their id or position
+        return f'{self.context_scope}/{child.attrib.get("id", position)}'
+
+    def enter_scope(self, child):
+        self.scope = self.child_scope(child, self.context_children)
+        self.scope_paths = {child: ''}
+        self.context_children += 1
+
+    def analyze_context_child(self, child, context_id):
+        self.enter_scope(child)
+        self.sections.append((self.context_scope, self.scope, len(self.rows)))
+
+        # routes already converted in a previous run are served from the cache
+        if self.cache is None or child.tag != ROUTE_TAG:
+            self.visit(child, context_id)
+            return
+
+        key = self.route_key(child, self.scope)
+        cached_rows = self.cache.get(key)
+        if cached_rows is not None:
+            self.add_converted(cached_rows, context_id)
+            return
+
+        first_row = len(self.rows)
+        first_ref = len(self.endpoint_refs)
+        unknown_count = sum(map(len, self.unknown_nodes.values()))
+        self.visit(child, context_id)
+        if sum(map(len, self.unknown_nodes.values())) != unknown_count:
+            # not cached so the unknown elements are reported again on the next runs
+            return
+        self.cache.put(key, self.converted(first_row, first_ref, context_id))
+
+    def route_key(self, route, scope):
+        # hash ids depend on the route position, they are cached as they are for that position. The links and
+        # labels of ref: uris and beans depend on the endpoint and bean definitions, the uris and classes they
+        # resolve to are part of the key
+        refs = {uri[4:] for uri in route.xpath('.//@uri') if uri.startswith('ref:')}
+        beans = {node.attrib['ref'] for node in route.iter(BEAN_TAG) if 'ref' in node.attrib}
+        return self.cache.route_key(route, salt=scope if self.id_strategy == 'hash' else self.id_strategy,
+                                    endpoints=[(ref, self.endpoints.get(ref, '')) for ref in refs],
+                                    beans=[(ref, self.bean_refs.get(ref, '')) for ref in beans])
+
+    def converted(self, first_row, first_ref, context_id):
+        # the rows and linked endpoints of a route without the ids of this run, as stored in the route cache.
+        # Linked endpoints are stored by row position, the camel context is the one of the route using the entry
+        from xml2drawio.cache import RouteCache
+        return {
+            'rows': RouteCache.pack_rows(self.rows[first_row:], context_id, renumber=self.id_strategy != 'hash'),
+            'endpoints': [(index - first_row, consumer, endpoint)
+                          for index, consumer, _, endpoint in self.endpoint_refs[first_ref:]],
+        }
+
+    def add_converted(self, converted, context_id):
+        from xml2drawio.cache import RouteCache
+        first_row = len(self.rows)
+        new_id = None if self.id_strategy == 'hash' else lambda: self.new_id(None)
+        self.rows.extend(RouteCache.unpack_rows(converted['rows'], context_id, new_id))
+        self.endpoint_refs.extend((first_row + index, consumer, self.context_scope, endpoint)
+                                  for index, consumer, endpoint in converted['endpoints'])
+
+    def walk_sharded(self, camelContext, context_id):
+        # The routes of the context are sent in shards to a process pool (serialized, with the source line of
+        # every element) and the converted rows added back in document order, with the ids this run would have
+        # created. Endpoints are collected first so every worker can resolve ref: uris
+        children = list(camelContext.iterchildren(etree.Element))
+        for child in children:
+            if child.tag == documents.ENDPOINT_TAG and 'id' in child.attrib and 'uri' in child.attrib:
+                self.endpoints[child.attrib['id']] = child.attrib['uri']
+
+        converted = {}
+        routes = []
+        for position, child in enumerate(children):
+            if child.tag != ROUTE_TAG:
+                continue
+            scope = self.child_scope(child, self.context_children + position)
+            cached_rows = self.cache.get(self.route_key(child, scope)) if self.cache is not None else None
+            if cached_rows is not None:
+                converted[position] = (cached_rows, None)
+            else:
+                routes.append((position, scope, etree.tostring(child)))
+
+        if routes:
+            import concurrent.futures
+            # in fail mode the workers go on and the first unknown element stops the conversion here
+            options = {'id_strategy': self.id_strategy, 'walker': 'iterative' if self.iterative else 'recursive',
+                       'unknown': 'skip' if self.unknown == 'fail' else self.unknown}
+            size = -(-len(routes) // (self.route_workers * 4))
+            shards = [routes[start:start + size] for start in range(0, len(routes), size)]
+            worker = functools.partial(convert_routes, type(self), options, self.endpoints, self.bean_refs,
+                                       self.context_scope)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.route_workers) as executor:
+                for shard in executor.map(worker, shards):
+                    converted.update((position, (rows, unknown)) for position, rows, unknown in shard)
+
+        for position, child in enumerate(children):
+            if position not in converted:
+                self.analyze_context_child(child, context_id)
                 continue
+            self.enter_scope(child)
+            self.sections.append((self.context_scope, self.scope, len(self.rows)))
+            rows, unknown = converted[position]
+            if unknown:
+                # workers report unknown elements by their position in the route, here they get their line
+                nodes = list(child.iter())
+                if self.unknown == 'fail':
+                    self.unknown_node(nodes[min(min(indexes) for indexes in unknown.values())])
+                for node, indexes in unknown.items():
+                    self.unknown_nodes.setdefault(node, []).extend(nodes[index].sourceline for index in indexes)
+            self.add_converted(rows, context_id)
+            if self.cache is not None and unknown == {}:
+                self.cache.put(self.route_key(child, self.scope), rows)
+
+    def get_namespaces(self, node):
+        if self.verbosity >= DEBUG:
+            self.log("namespaces:", namespaces=node.nsmap)
+
+    def visit(self, node, parent_id):
+        # converts node and all its subtree
+        self.analyze_child(node, parent_id)
+        if self.iterative:
+            self.drain()
 
-            process_function_name = node_name + "_def"
-            console.log("processing node", node_name, child.tag, child.sourceline)
-            next_node = getattr(self, process_function_name, None)
-            if next_node is None:
-                console.log("unknown node", process_function_name, child.sourceline)
-                sys.exit(1)
-            dsl_text += getattr(self, process_function_name)(child, parent_id)
-        return dsl_text
+    def analyze_node(self, node, parent_id):
+        # the iterative walker only schedules the children, drain processes them before the remaining
+        # siblings of node so the rows are emitted in the same order as the recursive walk
+        if self.iterative:
+            self.pending.append((iter(node), parent_id))
+            return
+        for child in node:
+            self.analyze_child(child, parent_id)
+
+    def drain(self):
+        pending = self.pending
+        while pending:
+            children, parent_id = pending[-1]
+            child = next(children, None)
+            if child is None:
+                pending.pop()
+            else:
+                self.analyze_child(child, parent_id)
+
+    def analyze_child(self, child, parent_id):
+        if not isinstance(child.tag, str):
+            # comments and processing instructions, kept in trees parsed by the caller
+            return
+        handler = self.handlers.get(child.tag)
+        if self.verbosity >= DEBUG:
+            self.log("processing node", node=child.tag.partition('}')[2], tag=child.tag, line=child.sourceline)
+        if handler is None:
+            handler = self.unknown_node(child)
+        handler(self, child, parent_id)
 
     def analyze_element(self, node, parent_id):
-        node_name = node.tag.partition('}')[2] + "_def"
-        console.log("processing node", node_name, node.tag, node.sourceline)
-        return getattr(self, node_name)(node, parent_id)
+        if self.verbosity >= DEBUG:
+            self.log("processing node", node=node.tag.partition('}')[2], tag=node.tag, line=node.sourceline)
+        handler = self.handlers.get(node.tag)
+        if handler is None:
+            # unknown expressions are labelled with their text
+            self.unknown_node(node)
+            return node.text or node.tag.partition('}')[2]
+        return handler(self, node, parent_id)
+
+    def unknown_node(self, node):
+        name = etree.QName(node).localname
+        line = self.source_line(node)
+        if self.unknown == 'fail':
+            raise UnknownElementError(name, line)
+        self.unknown_nodes.setdefault(name, []).append(line)
+        if self.verbosity >= DEBUG:
+            self.log("unknown node", style="yellow", node=name, line=line)
+        return Converter.generic_node if self.unknown == 'generic' else Converter.skipped_node
+
+    def source_line(self, node):
+        return node.sourceline
+
+    def generic_node(self, node, parent_id):
+        node_id = self.new_id(node)
+        self.emit(node_id, node.attrib.get('id', etree.QName(node).localname), UNKNOWN_SHAPE, parent_id)
+        self.analyze_node(node, node_id)
+
+    def skipped_node(self, node, parent_id):
+        # the children of a skipped element hang from its parent
+        self.analyze_node(node, parent_id)
+
+    # Handlers are looked up by the fully qualified tag ({namespace}localname) in a table built once per class
+    # from the *_def methods, subclasses get a copy with their own *_def methods added
+    @staticmethod
+    def handler_table(attributes, namespace=ns['camel']):
+        return {f'{{{namespace}}}{name[:-4]}': function
+                for name, function in attributes.items() if name.endswith('_def') and callable(function)}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.handlers = {**cls.handlers, **Converter.handler_table(vars(cls))}
+
+    @classmethod
+    def register(cls, tag, namespace=ns['camel']):
+        # decorator for adding handlers of custom elements, tag is the local name or the {namespace}localname
+        key = tag if tag.startswith('{') else f'{{{namespace}}}{tag}'
+
+        def decorator(function):
+            cls.handlers[key] = function
+            return function
+
+        return decorator
+
+    def propertyPlaceholder_def(self, node, parent_id):
+        # Skip property placeholders
+        pass
 
     def route_def(self, node, parent_id):
-        route_def = self.analyze_node(node, parent_id)
-        return route_def
+        # the from row is the root of the route, it takes the route id and the other children hang from it
+        self.analyze_node(node, self.new_id(node))
 
     def dataFormats_def(self, node, parent_id):
-        dataformats = self.analyze_node(node, parent_id)
-        return dataformats
+        self.analyze_node(node, parent_id)
 
     def json_def(self, node, parent_id):
         # name = node.attrib['id']
@@ -121,57 +880,40 @@ id,component,shape,refs
         #     json_dataformat += self.indent(f'{name}.unmarshalType({node.attrib["unmarshalTypeName"]}.class);')
 
         # return json_dataformat + '\n'
-        return ''
+        pass
 
     def endpoint_def(self, node, parent_id):
         endpoint_id = node.attrib['id']
         uri = node.attrib['uri']
         self.endpoints[endpoint_id] = uri
-        return ""
 
     def multicast_def(self, node, parent_id):
-        node_id= uuid.uuid4()
-        csv_def = f'{node_id},multicast,mxgraph.eip.recipient_list,{parent_id}\n'
-        multicast_def = csv_def
+        node_id = self.new_id(node)
+        self.emit(node_id, 'multicast', 'mxgraph.eip.recipient_list', parent_id)
         
-        multicast_def += self.analyze_node(node, node_id)
+        self.analyze_node(node, node_id)
         
         # multicast_def += self.indent('.end() // end multicast')
-        return multicast_def
 
     def bean_def(self, node, parent_id):
-        ref = node.attrib['ref']
-        method = node.attrib['method']
-        return self.indent(f'.bean({self.bean_refs[ref]}.class, "{method}")')
+        # labelled with the bean class when the ref is a spring bean, and the method called
+        bean = node.attrib.get('ref') or node.attrib.get('beanType', 'bean')
+        method = node.attrib.get('method')
+        label = self.bean_refs.get(bean, bean) + (f'.{method}' if method else '')
+        self.emit(self.new_id(node), label, 'rect', parent_id)
 
     def recipientList_def(self, node, parent_id):
-        node_id= uuid.uuid4()
-        csv_def = f'{node_id},recipient list,mxgraph.eip.recipient_list,{parent_id}\n'
-        recipient_def = csv_def
-        recipient_def += self.analyze_node(node, node_id)
+        node_id = self.new_id(node)
+        self.emit(node_id, 'recipient list', 'mxgraph.eip.recipient_list', parent_id)
+        self.analyze_node(node, node_id)
         # recipient_def += self.indent('.end() // end recipientList')
-        return recipient_def
 
     def errorHandler_def(self, node, parent_id):
-        if node.attrib['type'] == "DefaultErrorHandler":
-            return self.indent('defaultErrorHandler().setRedeliveryPolicy(policy);')
-        else:
-            return ""
+        # error handlers and redelivery policies configure the context, they are not drawn
+        pass
 
     def redeliveryPolicyProfile_def(self, node, parent_id):
-        policy_def = "\nRedeliveryPolicy policy = new RedeliveryPolicy()"
-        if "maximumRedeliveries" in node.attrib:
-            policy_def += ".maximumRedeliveries(" + node.attrib["maximumRedeliveries"] + ")"
-        if "retryAttemptedLogLevel" in node.attrib:
-            policy_def += ".retryAttemptedLogLevel(LoggingLevel." + node.attrib["retryAttemptedLogLevel"] + ")"
-        if "redeliveryDelay" in node.attrib:
-            policy_def += ".redeliveryDelay(" + node.attrib["redeliveryDelay"] + ")"
-        if "logRetryAttempted" in node.attrib:
-            policy_def += ".logRetryAttempted(" + node.attrib["logRetryAttempted"] + ")"
-        if "logRetryStackTrace" in node.attrib:
-            policy_def += ".logRetryStackTrace(" + node.attrib["logRetryStackTrace"] + ")"
-        policy_def += ";"
-        return policy_def
+        pass
 
     def onException_def(self, node, parent_id):
         # exceptions = []
@@ -221,20 +963,18 @@ id,component,shape,refs
         #     
 
         #return onException_def
-        return ''
+        pass
 
     def description_def(self, node, parent_id):
         #return self.indent(f'.description("{node.text}")')
-        return ''
+        pass
 
     def from_def(self, node, parent_id):
         routeFrom = self.deprecatedProcessor(node.attrib['uri'])
         routeId = node.getparent().attrib['id'] if 'id' in node.getparent().keys() else routeFrom
-        node_id= uuid.uuid4()
-        csv_def = f'{parent_id},{routeId},mxgraph.eip.polling_consumer\n'
-        from_def = csv_def
-        from_def += self.analyze_node(node,node_id)
-        return from_def
+        self.link_endpoint(routeFrom, consumer=True)
+        self.emit(parent_id, routeId, 'mxgraph.eip.polling_consumer')
+        self.analyze_node(node, parent_id)
 
     def log_def(self, node, parent_id):
         # message = self.deprecatedProcessor(node.attrib['message'])
@@ -242,38 +982,31 @@ id,component,shape,refs
         #     return self.indent(f'.log(LoggingLevel.{node.attrib["loggingLevel"]}, "{message}"){self.handle_id(node)}')
         # else:
         #     return self.indent(f'.log("{message}"){self.handle_id(node)}')
-        return ''
+        pass
 
     def choice_def(self, node, parent_id):
-        node_id = uuid.uuid4()
-        csv_def = f'{node_id},choice,mxgraph.eip.content_based_router,{parent_id}\n'
-        choice_def = csv_def
+        node_id = self.new_id(node)
+        self.emit(node_id, 'choice', 'mxgraph.eip.content_based_router', parent_id)
         
-        choice_def += self.analyze_node(node, node_id)
+        self.analyze_node(node, node_id)
         
 
         # choice_def += self.indent(f'.end() // end choice (source line: {str(node.sourceline)})')
 
-        return choice_def
-
     def when_def(self, node, parent_id):
         # when_def = self.indent('.when(' + self.analyze_element(node[0]) + ')' + self.handle_id(node))
         # node.remove(node[0])
         # 
-        when_def = ''
-        when_def += self.analyze_node(node, parent_id)
+        self.analyze_node(node, parent_id)
         # 
         # when_def += self.indent(f'.endChoice() // (source line: {str(node.sourceline)})')
-        return when_def
 
     def otherwise_def(self, node, parent_id):
         # otherwise_def = self.indent(f'.otherwise(){self.handle_id(node)}')
         # 
-        otherwise_def = ''
-        otherwise_def += self.analyze_node(node, parent_id)
+        self.analyze_node(node, parent_id)
         # 
         # otherwise_def += self.indent(f'.endChoice() // (source line: {str(node.sourceline)})')
-        return otherwise_def
 
     def simple_def(self, node, parent_id):
         # result_type = f', {node.attrib["resultType"]}.class' if 'resultType' in node.attrib else ''
@@ -304,7 +1037,7 @@ id,component,shape,refs
         # return f'jsonpath("{expression}"{result_type}){self.handle_id(node)}'
         return ''
 
-    def to_definition(self, node, to_type):
+    def to_definition(self, node, node_id, label, shape, parent_id):
         uri = self.componentOptions(node.attrib['uri'])
         if 'ref:' in uri:
             uri = self.endpoints[uri[4:]]
@@ -316,79 +1049,75 @@ id,component,shape,refs
 
         #node_id = self.handle_id(node)
 
-        return to_type
+        self.link_endpoint(uri, consumer=False)
+        self.emit(node_id, label, shape, parent_id)
 
     def to_def(self, node, parent_id):
-        node_id = uuid.uuid4()
-        csv_def = f'{node_id},to,rect,{parent_id}\n'
-
-        return self.to_definition(node, csv_def)
+        node_id = self.new_id(node)
+        self.to_definition(node, node_id, 'to', 'rect', parent_id)
 
     def toD_def(self, node, parent_id):
-        node_id = uuid.uuid4()
-        csv_def = f'{node_id},toD,mxgraph.eip.dynamic_router,{parent_id}\n'
-        return self.to_definition(node, node_id)
+        node_id = self.new_id(node)
+        self.to_definition(node, node_id, 'toD', 'mxgraph.eip.dynamic_router', parent_id)
 
     def setBody_def(self, node, parent_id):
         predicate = self.analyze_element(node[0], parent_id)
         groovy_predicate = f'.{predicate}' if predicate.startswith('groovy') else ''
         predicate = '' if groovy_predicate else predicate
-        node_id = uuid.uuid4()
-        csv_def = f'{node_id},{predicate},mxgraph.eip.message_translator,{parent_id}\n'
-        return csv_def
+        node_id = self.new_id(node)
+        self.emit(node_id, predicate, 'mxgraph.eip.message_translator', parent_id)
 
     def convertBodyTo_def(self, node, parent_id):
         # return self.setBody_def(self, node)
-        return ''
+        pass
 
     def unmarshal_def(self, node, parent_id):
         # return self.setBody_def(self, node)
-        return ''
+        pass
 
     def marshal_def(self, node, parent_id):
         # return self.setBody_def(self, node)
-        return ''
+        pass
 
     def jaxb_def(self, node, parent_id):
         # if 'prettyPrint' in node.attrib:
         #     return '.jaxb("' + node.attrib['contextPath'] + '")'
         # else:
         #     return '.jaxb("' + node.attrib['contextPath'] + '")'
-        return ''
+        pass
 
-    def base64_def(self, node):
+    def base64_def(self, node, parent_id):
         # return '.base64()'
-        return ''
+        pass
 
     def setHeader_def(self, node, parent_id):
         # name_attrib = 'headerName' if 'headerName' in node.attrib else 'name'
         # return self.set_expression(node, 'setHeader', node.attrib[name_attrib])
-        return ''
+        pass
 
     def setProperty_def(self, node, parent_id):
         # name_attrib = 'propertyName' if 'propertyName' in node.attrib else 'name'
         # return self.set_expression(node, 'setProperty', node.attrib[name_attrib])
-        return ''
+        pass
 
     def setExchangePattern_def(self, node, parent_id):
         #return self.set_expression(node, 'setExchangePattern', f'ExchangePattern.{node.attrib["pattern"]}')
-        return ''
+        pass
 
     def process_def(self, node, parent_id):
         #return self.indent(f'.process({node.attrib["ref"]}){self.handle_id(node)}')
-        return ''
+        pass
 
     def inOnly_def(self, node, parent_id):
         # return self.indent(f'.inOnly("{node.attrib["uri"]}")')
         # return to_def(self, node)
-        return ''
+        pass
 
     def split_def(self, node, parent_id):
-        expression = self.analyze_element(node[0])
-        node.remove(node[0])  # remove first child as was processed
-        node_id = uuid.uuid4()
-        csv_def = f'{node_id},{predicate},mxgraph.eip.splitter,{parent_id}\n'
-        split_def = csv_def
+        # the expression is the first child, it emits no row when the children are walked
+        expression = self.analyze_element(node[0], parent_id)
+        node_id = self.new_id(node)
+        self.emit(node_id, expression or 'split', 'mxgraph.eip.splitter', parent_id)
         # if 'streaming' in node.attrib:
         #     split_def += '.streaming()'
         # if 'strategyRef' in node.attrib:
@@ -396,19 +1125,18 @@ id,component,shape,refs
         # if 'parallelProcessing' in node.attrib:
         #     split_def += '.parallelProcessing()'
         # 
-        split_def += self.analyze_node(node, node_id)
+        self.analyze_node(node, node_id)
         # 
         # split_def += self.indent('.end() // end split')
-        return split_def
 
     def removeHeaders_def(self, node, parent_id):
         # exclude_pattern = ', "' + node.attrib['excludePattern'] + '"' if 'excludePattern' in node.attrib else ''
         # return self.indent(f'.removeHeaders("{node.attrib["pattern"]}"{exclude_pattern})')
-        return ''
+        pass
 
     def removeHeader_def(self, node, parent_id):
         # return self.indent(f'.removeHeaders("{node.attrib["headerName"]}")')
-        return ''
+        pass
 
     def xquery_def(self, node, parent_id):
         # return f'xquery("{node.text}") // xquery not finished please review'
@@ -421,7 +1149,7 @@ id,component,shape,refs
         # 
         # doTry_def += self.indent(f'.endDoTry() // (source line: {str(node.sourceline)})')
         # return doTry_def
-        return ''
+        pass
 
     def doCatch_def(self, node, parent_id):
         # exceptions = []
@@ -436,37 +1164,35 @@ id,component,shape,refs
         # doCatch_def += self.analyze_node(node, parent_id)
         # 
         # return doCatch_def
-        return ''
+        pass
 
     def onWhen_def(self, node, parent_id):
         #onWhen_predicate = self.analyze_element(node[0])
         #node.remove(node[0])
         #return f'.onWhen({onWhen_predicate})'
-        return ''
+        pass
 
     def doFinally_def(self, node, parent_id):
         #
-        doFinally_Def = self.analyze_node(node, parent_id)
+        self.analyze_node(node, parent_id)
         #
-        return doFinally_Def
 
     def handled_def(self, node, parent_id):
         #return '.handled(' + node[0].text + ')'
-        return ''
+        pass
 
     def transacted_def(self, node, parent_id):
         #transacted_ref = ''
         #return self.indent(f'.transacted({transacted_ref}){self.handle_id(node)}')
-        return ''
+        pass
 
     def wireTap_def(self, node, parent_id):
         # if 'executorServiceRef' in node.attrib:
         #     return self.indent(f'.wireTap("{node.attrib["uri"]}"){self.handle_id(node)}.executorServiceRef("profile")')
         # else:
         #     return self.indent(f'.wireTap("{node.attrib["uri"]}"){self.handle_id(node)}')
-        node_id= uuid.uuid4()
-        csv_def = f'{node_id},{predicate},mxgraph.eip.wire_tap,{parent_id}\n'
-        return csv_def
+        node_id = self.new_id(node)
+        self.to_definition(node, node_id, 'wire tap', 'mxgraph.eip.wire_tap', parent_id)
 
     def language_def(self, node, parent_id):
         #return 'language("' + node.attrib['language'] + '","' + node.text + '")'
@@ -485,14 +1211,12 @@ id,component,shape,refs
         # else:
         #     threads_def = '\n.threads(' + poolSize + ',' + maxPoolSize + ')'
 
-        threads_def += self.analyze_node(node, parent_id)
+        self.analyze_node(node, parent_id)
         # threads_def += "\n.end() //end threads"
-        return threads_def
 
     def delay_def(self, node, parent_id):
         #delay_def = '\n.delay().'
-        delay_def += self.analyze_node(node, parent_id)
-        return delay_def
+        self.analyze_node(node, parent_id)
 
     def javaScript_def(self, node, parent_id):
         #return 'new JavaScriptExpression("' + node.text + '")'
@@ -516,7 +1240,7 @@ id,component,shape,refs
         #     if node.attrib['rejectedPolicy'] == 'Abort':
         #         profileDef += '\nprofile.setRejectedPolicy(ThreadPoolRejectedPolicy.Abort);'
         # return profileDef
-        return ''
+        pass
 
     def throwException_def(self, node, parent_id):
         # has_ref = 'ref' in node.attrib
@@ -527,8 +1251,7 @@ id,component,shape,refs
         #     if has_ref else node.attrib['message']
 
         # throwException_def = self.indent(f'.throwException({exception_type}.class, "{message}"){self.handle_id(node)}')
-        throwException_def += self.analyze_node(node, parent_id)
-        return throwException_def
+        self.analyze_node(node, parent_id)
 
     def spel_def(self, node, parent_id):
         #return 'SpelExpression.spel("' + node.text + '")'
@@ -538,10 +1261,9 @@ id,component,shape,refs
         # loop_def = self.indent(f'.loop({self.analyze_element(node[0])}){self.handle_id(node)}')
         # node.remove(node[0])
         # 
-        loop_def += self.analyze_node(node, parent_id)
+        self.analyze_node(node, parent_id)
         # 
         # loop_def += self.indent(f'.end() // end loop (source line: {str(node.sourceline)})')
-        return loop_def
 
     def aggregate_def(self, node, parent_id):
         # aggregate_def = self.indent('.aggregate()')
@@ -554,10 +1276,9 @@ id,component,shape,refs
 
         # node.remove(node[0])  # remove first child as was processed
         # 
-        aggregate_def += self.analyze_node(node, parent_id)
+        self.analyze_node(node, parent_id)
         # 
         # aggregate_def += self.indent('.end() // end aggregate')
-        return aggregate_def
 
     def correlationExpression_def(self, node, parent_id):
         #return '.' + self.analyze_node(node, parent_id)
@@ -569,7 +1290,7 @@ id,component,shape,refs
 
     def stop_def(self, node, parent_id):
         #return self.indent('.stop()')
-        return ''
+        pass
 
     def restConfiguration_def(self, node, parent_id):
 
@@ -595,15 +1316,15 @@ id,component,shape,refs
         # rest_configuration += ';\n'
 
         #return rest_configuration
-        return ''
+        pass
 
     def componentProperty_def(self, node, parent_id):
         #return self.indent(f'.componentProperty("{node.attrib["key"]}", "{node.attrib["value"]}")')
-        return ''
+        pass
 
     def dataFormatProperty_def(self, node, parent_id):
         #return self.indent(f'.dataFormatProperty("{node.attrib["key"]}", "{node.attrib["value"]}")')
-        return ''
+        pass
 
     def rest_def(self, node, parent_id):
         # path = node.attrib['path'] if 'path' in node.attrib else ''
@@ -614,15 +1335,15 @@ id,component,shape,refs
 
         # rest += ';\n'
         # return rest
-        return ''
+        pass
 
     def get_def(self, node, parent_id):
         #return self.generic_rest_def(node, 'get')
-        return ''
+        pass
 
     def post_def(self, node, parent_id):
         #return self.generic_rest_def(node, 'post')
-        return ''
+        pass
 
     def param_def(self, node, parent_id):
         # param = '.param()'
@@ -648,7 +1369,7 @@ id,component,shape,refs
 
         # return self.indent(param)
         # # param().name("id").type(path).description("The id of the user to get").dataType("int").endParam()
-        return ''
+        pass
 
     def generic_rest_def(self, node, verb):
         # uri = node.attrib['uri'] if 'uri' in node.attrib else ''
@@ -675,38 +1396,29 @@ id,component,shape,refs
         # 
 
         # return rest_call
-        return ''
+        pass
 
     # Text deprecated processor for camel deprecated endpoints and features
     @staticmethod
+    @functools.lru_cache(maxsize=URI_CACHE_SIZE)
     def deprecatedProcessor(text):
-        # exchange property in simple expressions
-        text = re.sub('\${property\.(\w+\.?\w+)}', r'${exchangeProperty.\1}', text)
-        text = re.sub('\${header\.(\w+\.?\w+)}', r'${headers.\1}', text)
-        text = re.sub('"', "'", text)  # replace all occurrences from " to '
-        text = re.sub('\n', "", text)  # remove all endlines
-
-        # convert all property references
-        for match in re.finditer(r"\$(\{[\w\.\_]+\})", text):
-            if 'exchangeProperty' not in match.group(0) and 'headers' not in match.group(0):
-                text = text.replace(match.group(0), '{' + match.group(1) + '}')
-                text = text.replace(match.group(0), f'{{{match.group(1)}}}')
-
+        for pattern, replacement in DEPRECATED_RULES:
+            text = pattern.sub(replacement, text)
         return text
 
     # Text processor for apply custom options in to endpoints
     @staticmethod
+    @functools.lru_cache(maxsize=URI_CACHE_SIZE)
     def componentOptions(text):
         if "velocity:" in text:
             text += "?contentCache=true"
         return text
 
-    def set_expression(self, node, set_method, parameter=None):
-        predicate = self.analyze_element(node[0])
-        groovy_predicate = f'.{predicate}' if predicate.startswith("groovy") else ''
-        predicate = '' if groovy_predicate else predicate
-        parameter = f'"{parameter.strip()}", ' if parameter else ''
-        return self.indent(f'.{set_method}({parameter}{predicate.strip()}){groovy_predicate}')
+    @staticmethod
+    def uri_cache_info():
+        # hits and misses of the memoized uri rewrites
+        return {name: getattr(Converter, name).cache_info()._asdict()
+                for name in ('deprecatedProcessor', 'componentOptions')}
 
     def process_multiline_groovy(self, text):
         parts = re.split('\r?\n', text)
@@ -727,15 +1439,77 @@ id,component,shape,refs
     def handle_id(node):
         return f'.id("{node.attrib["id"]}")' if 'id' in node.attrib else ''
 
-    def indent(self, text: str) -> str:
-        return '\n' + (' ' * 4 * self.indentation) + text if text else ''
-
 
-if __name__ == "__main__":
-    converter = Converter()
-    converter.xml_to_drawio()
+Converter.handlers = Converter.handler_table(vars(Converter))
+
+
+def convert_routes(converter_class, options, endpoints, bean_refs, context_scope, routes):
+    # runs in a worker process of the sharded walk, routes are (position, scope, xml) and the result is
+    # (position, converted rows, unknown elements) for each one. Unknown elements are reported by their
+    # position in the route instead of the line
+    results = []
+    for position, scope, xml in routes:
+        route = etree.fromstring(xml, etree.XMLParser(huge_tree=True))
+        converter = converter_class(verbosity=SILENT, follow_imports=False, **options)
+        # one pass over the route, the parent gets the line of an index from its own list of the elements
+        converter.source_line = {element: index for index, element in enumerate(route.iter())}.__getitem__
+        converter.endpoints = endpoints
+        converter.bean_refs = bean_refs
+        converter.context_scope = context_scope
+        converter.scope = scope
+        converter.scope_paths = {route: ''}
+        converter.visit(route, 'context')
+        results.append((position, converter.converted(0, 0, 'context'), converter.unknown_nodes))
+    return results
+
+
+def path_steps(parent):
+    # (child, '/step') of the element children of parent, as written by libxml2 in getpath: elements of a
+    # default namespace are '*' numbered among all the element siblings, the others are numbered among the
+    # siblings of the same name, the number only when there are several
+    children = list(parent.iterchildren(etree.Element))
+    keys = []
+    for child in children:
+        if child.prefix is None and child.tag[0] == '{':
+            keys.append(None)
+        else:
+            local_name = child.tag.rpartition('}')[2]
+            keys.append((f'{child.prefix}:{local_name}' if child.prefix else local_name, child.prefix))
+    counts = collections.Counter(keys)
+    seen = collections.Counter()
+    steps = []
+    for position, (child, key) in enumerate(zip(children, keys), 1):
+        if key is None:
+            steps.append((child, f'/*[{position}]' if len(children) > 1 else '/*'))
+            continue
+        seen[key] += 1
+        steps.append((child, f'/{key[0]}[{seen[key]}]' if counts[key] > 1 else f'/{key[0]}'))
+    return steps
+
+
+def convert(source, converter=None, **options):
+    # Library entry point: source is a path, xml bytes, a file object or a parsed lxml tree. Options are the
+    # Converter arguments (silent by default), or converter is an existing instance whose options and caches
+    # are reused for this conversion
+    if converter is None:
+        converter = Converter(**{'verbosity': SILENT, **options})
+    else:
+        converter = converter.fresh()
+    return converter.convert(source)
 
 
 def main():
+    # --version is answered before creating the converter and parsing the options
+    if '--version' in sys.argv[1:]:
+        print(version())
+        return
     converter = Converter()
-    converter.xml_to_drawio()
\ No newline at end of file
+    try:
+        converter.xml_to_drawio()
+    except UnknownElementError as e:
+        converter.log("unknown node", node=e.name + "_def", line=e.line)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import io
+import json
+import os
+import unittest
+
+from lxml import etree
+
+import xml2drawio
+from xml2drawio.cache import RouteCache
+from xml2drawio.xml2drawio import Converter, Diagram
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestApi(unittest.TestCase):
+
+    def test_sources(self):
+        with open(CAMEL_CONTEXT, 'rb') as f:
+            body = f.read()
+        expected = xml2drawio.convert(CAMEL_CONTEXT, id_strategy='sequential')
+
+        self.assertIsInstance(expected, Diagram)
+        self.assertEqual(len(expected.rows), 12)
+        # the default lxml parser keeps the comments
+        commented = body.replace(b'<from ', b'<!-- entry point --><?pi?><from ').replace(b'<route ', b'<!----><route ')
+        for source in (body, io.BytesIO(body), etree.parse(CAMEL_CONTEXT), etree.fromstring(body),
+                       etree.fromstring(commented)):
+            diagram = xml2drawio.convert(source, id_strategy='sequential')
+            self.assertEqual((diagram.rows, diagram.sections), (expected.rows, expected.sections))
+
+    def test_nodes_and_edges(self):
+        diagram = xml2drawio.convert(CAMEL_CONTEXT, id_strategy='sequential')
+
+        self.assertEqual(diagram.nodes[0], (2, 'ROUTE_BT_route', 'mxgraph.eip.polling_consumer'))
+        self.assertEqual(len(diagram.edges), len(diagram.nodes) - 3)
+        self.assertIn((2, 3), diagram.edges)
+        data = json.loads(json.dumps(diagram.as_dict()))
+        self.assertEqual(data['nodes'][1], {'id': '3', 'label': 'choice', 'shape': 'mxgraph.eip.content_based_router'})
+        self.assertEqual(data['links'], [])
+        self.assertIn('ROUTE_BT_route', diagram.render())
+        self.assertEqual(len(diagram.pages('route')), 3)
+
+    def test_reused_converter(self):
+        route_cache = RouteCache(in_memory=True)
+        self.addCleanup(route_cache.close)
+        converter = Converter(cache=route_cache, id_strategy='hash')
+
+        first = xml2drawio.convert(CAMEL_CONTEXT, converter=converter)
+        second = xml2drawio.convert(CAMEL_CONTEXT, converter=converter)
+
+        self.assertEqual(first.rows, second.rows)
+        self.assertEqual(route_cache.hits, 3)
+        self.assertEqual(converter.rows, [])
+
+    def test_unknown_elements_raise(self):
+        with open(CAMEL_CONTEXT, 'rb') as f:
+            body = f.read().replace(b'<from uri="direct:do-try-test"/>', b'<from uri="direct:do-try-test"/><throttle/>')
+
+        with self.assertRaises(xml2drawio.UnknownElementError) as raised:
+            xml2drawio.convert(body)
+        self.assertIsInstance(raised.exception, Exception)
+        self.assertEqual(raised.exception.name, 'throttle')
+        self.assertEqual(xml2drawio.convert(body, unknown='skip').unknown['throttle']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from xml2drawio import batch
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.inputs = os.path.join(self.tmp, 'inputs')
+        os.makedirs(os.path.join(self.inputs, 'nested'))
+        shutil.copy(CAMEL_CONTEXT, os.path.join(self.inputs, 'first.xml'))
+        shutil.copy(CAMEL_CONTEXT, os.path.join(self.inputs, 'nested', 'second.xml'))
+
+    def test_collect_files(self):
+        expected = [os.path.join(self.inputs, 'first.xml'), os.path.join(self.inputs, 'nested', 'second.xml')]
+        self.assertEqual(batch.collect_files(self.inputs), expected)
+        self.assertEqual(batch.collect_files(os.path.join(self.inputs, '**', '*.xml')), expected)
+
+        manifest = os.path.join(self.inputs, 'manifest.txt')
+        with open(manifest, 'w') as f:
+            f.write('# nightly\nfirst.xml\n\nnested/second.xml\n')
+        self.assertEqual(batch.collect_files(manifest), expected)
+
+    def test_run_batch_writes_one_diagram_per_file(self):
+        with open(os.path.join(self.inputs, 'broken.xml'), 'w') as f:
+            f.write('<beans>')
+        output_dir = os.path.join(self.tmp, 'out')
+
+        status = batch.run_batch(self.inputs, workers=2, output_dir=output_dir)
+
+        self.assertEqual(status, 1)
+        self.assertEqual(sorted(os.listdir(output_dir)), ['first.csv', 'second.csv'])
+
+    def test_workers_write_the_diagrams(self):
+        output_path = os.path.join(self.tmp, 'first.drawio')
+
+        result = batch.convert_file(os.path.join(self.inputs, 'first.xml'), output_path=output_path,
+                                    output_format='drawio')
+
+        # only the status is sent back to the parent process
+        self.assertEqual(result[1:3], (None, None))
+        with open(output_path) as f:
+            self.assertIn('ROUTE_BT_route', f.read())
+
+    def test_run_batch_merged(self):
+        merged = os.path.join(self.tmp, 'merged.csv')
+        self.assertEqual(batch.run_batch(self.inputs, workers=2, merge=merged), 0)
+        with open(merged) as f:
+            self.assertEqual(f.read().count('ROUTE_BT_route'), 2)
+
+    def test_unknown_elements_report(self):
+        with open(CAMEL_CONTEXT) as f:
+            xml = f.read().replace('<from uri="direct:do-try-test"/>', '<from uri="direct:do-try-test"/><throttle/>', 1)
+        with open(os.path.join(self.inputs, 'nested', 'second.xml'), 'w') as f:
+            f.write(xml)
+        output_dir = os.path.join(self.tmp, 'out')
+        report_path = os.path.join(self.tmp, 'unknown.json')
+
+        self.assertEqual(batch.run_batch(self.inputs, workers=2, output_dir=output_dir), 1)
+        status = batch.run_batch(self.inputs, workers=2, output_dir=output_dir, unknown='generic',
+                                 unknown_report=report_path)
+
+        self.assertEqual(status, 0)
+        with open(report_path) as f:
+            report = json.load(f)
+        self.assertEqual(list(report), ['throttle'])
+        self.assertEqual(report['throttle']['count'], 1)
+        self.assertEqual(list(report['throttle']['files']), [os.path.join(self.inputs, 'nested', 'second.xml')])
+
+
+if __name__ == '__main__':
+    unittest.main()
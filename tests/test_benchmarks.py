@@ -0,0 +1,49 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import generate  # noqa: E402
+import run  # noqa: E402
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generated_context_size(self):
+        # per route: from, a multicast of 2 choices with 3 branches of setBody + to, and the endpoint to
+        self.assertEqual(run.run_case('10,2,2,5', repeat=1)['rows'], 10 * 17)
+
+    def test_generated_context_is_valid_xml(self):
+        output = io.StringIO()
+        generate.generate(output, routes=3, depth=3, fanout=2, endpoints=2)
+        self.assertEqual(output.getvalue().count('<route id='), 3)
+
+    def test_baseline_comparison(self):
+        result = run.run_case('5,1,2,1', repeat=1)
+        baseline = {'results': [dict(result, seconds={phase: seconds / 10 for phase, seconds
+                                                      in result['seconds'].items()})]}
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as baseline_file:
+            json.dump(baseline, baseline_file)
+        baseline_path = baseline_file.name
+        self.addCleanup(os.remove, baseline_path)
+
+        self.assertTrue(run.compare([result], baseline_path, tolerance=1.25))
+
+    def test_memory_per_node_comparison(self):
+        result = run.run_case('5,1,2,1', repeat=1)
+        self.assertGreater(result['bytes_per_node'], 0)
+        baseline = {'results': [dict(result, seconds={}, bytes_per_node=result['bytes_per_node'] / 2)]}
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as baseline_file:
+            json.dump(baseline, baseline_file)
+        self.addCleanup(os.remove, baseline_file.name)
+
+        self.assertEqual([regression.split(' ')[1] for regression in run.compare([result], baseline_file.name, 1.25)],
+                         ['memory:'])
+
+
+if __name__ == '__main__':
+    unittest.main()
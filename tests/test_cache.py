@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from xml2drawio.cache import RouteCache
+from xml2drawio.documents import DocumentCache
+from xml2drawio.xml2drawio import Converter, convert
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+REF_CONTEXT = '''<beans xmlns="http://www.springframework.org/schema/beans">
+<camelContext xmlns="http://camel.apache.org/schema/spring">
+    <endpoint id="e" uri="{uri}"/>
+    <route id="a"><from uri="direct:a"/><log message="a"/></route>
+    <route id="b"><from uri="direct:b"/><log message="b"/></route>
+    <route id="caller"><from uri="timer:t"/><to uri="ref:e"/></route>
+</camelContext>
+</beans>'''
+
+BEAN_CONTEXT = '''<beans xmlns="http://www.springframework.org/schema/beans">
+<import resource="beans.xml"/>
+<camelContext xmlns="http://camel.apache.org/schema/spring">
+    <route id="r"><from uri="direct:r"/><bean ref="service" method="go"/></route>
+</camelContext>
+</beans>'''
+
+
+def normalize(rows):
+    # ids renumbered in order of appearance, fresh ids are created for the routes served from the cache
+    ids = {'': ''}
+    return [tuple(ids.setdefault(value, len(ids)) for value in (node_id, ref)) + (label, shape)
+            for node_id, label, shape, ref in rows]
+
+
+class TestRouteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def convert(self, route_cache):
+        return normalize(Converter(cache=route_cache).convert_file(CAMEL_CONTEXT))
+
+    def test_cached_routes_produce_the_same_rows(self):
+        expected = self.convert(None)
+
+        first_cache = RouteCache(self.cache_dir)
+        self.assertEqual(self.convert(first_cache), expected)
+        self.assertEqual((first_cache.hits, first_cache.misses), (0, 3))
+        first_cache.close()
+
+        second_cache = RouteCache(self.cache_dir)
+        self.assertEqual(self.convert(second_cache), expected)
+        self.assertEqual((second_cache.hits, second_cache.misses), (3, 0))
+        second_cache.close()
+
+    def test_cached_routes_keep_reproducible_ids(self):
+        for id_strategy in ('sequential', 'hash'):
+            expected = Converter(id_strategy=id_strategy).convert_file(CAMEL_CONTEXT)
+            for _ in range(2):
+                route_cache = RouteCache(os.path.join(self.cache_dir, id_strategy))
+                rows = Converter(cache=route_cache, id_strategy=id_strategy).convert_file(CAMEL_CONTEXT)
+                route_cache.close()
+                self.assertEqual(rows, expected)
+
+    def test_cached_routes_keep_route_links(self):
+        expected = Converter(id_strategy='sequential')
+        expected.convert_file(CAMEL_CONTEXT)
+        for _ in range(2):
+            route_cache = RouteCache(self.cache_dir)
+            converter = Converter(cache=route_cache, id_strategy='sequential')
+            converter.convert_file(CAMEL_CONTEXT)
+            route_cache.close()
+            self.assertEqual(converter.endpoint_refs, expected.endpoint_refs)
+
+    def test_changed_endpoint_definitions_are_not_served_from_the_cache(self):
+        def linked_route(uri):
+            route_cache = RouteCache(self.cache_dir)
+            diagram = convert(REF_CONTEXT.format(uri=uri).encode(), cache=route_cache, id_strategy='sequential')
+            route_cache.close()
+            labels = {node_id: label for node_id, label, _ in diagram.nodes}
+            return [labels[target] for _, target in diagram.links]
+
+        self.assertEqual(linked_route('direct:a'), ['a'])
+        self.assertEqual(linked_route('direct:b'), ['b'])
+        self.assertEqual(linked_route('direct:a'), ['a'])
+
+    def test_changed_bean_classes_are_not_served_from_the_cache(self):
+        main = os.path.join(self.cache_dir, 'main.xml')
+        with open(main, 'w') as f:
+            f.write(BEAN_CONTEXT)
+
+        def bean_label(bean_class):
+            with open(os.path.join(self.cache_dir, 'beans.xml'), 'w') as f:
+                f.write(f'<beans xmlns="http://www.springframework.org/schema/beans">'
+                        f'<bean id="service" class="{bean_class}"/></beans>')
+            route_cache = RouteCache(self.cache_dir)
+            diagram = convert(main, cache=route_cache, document_cache=DocumentCache())
+            route_cache.close()
+            return diagram.nodes[1][1]
+
+        self.assertEqual(bean_label('com.acme.Other'), 'com.acme.Other.go')
+        self.assertEqual(bean_label('com.acme.Renamed'), 'com.acme.Renamed.go')
+        self.assertEqual(bean_label('com.acme.Other'), 'com.acme.Other.go')
+
+    def test_workers_do_not_hold_the_write_lock(self):
+        # two batch workers sharing the database, each one writes only when its file is done
+        first, second = RouteCache(self.cache_dir), RouteCache(self.cache_dir)
+        first.put('a', [])
+        self.assertEqual(first.get('a'), [])
+        second.put('b', [1])
+        second.close()
+        self.assertEqual(first.get('b'), [1])
+        first.close()
+
+        route_cache = RouteCache(self.cache_dir)
+        self.assertEqual((route_cache.get('a'), route_cache.get('b')), ([], [1]))
+        route_cache.close()
+
+    def test_least_recently_used_entries_are_evicted(self):
+        route_cache = RouteCache(self.cache_dir, max_entries=2)
+        for key in ('a', 'b', 'c'):
+            route_cache.put(key, [])
+        route_cache.get('a')
+        route_cache.close()
+
+        route_cache = RouteCache(self.cache_dir, max_entries=2)
+        self.assertIsNotNone(route_cache.get('a'))
+        self.assertIsNotNone(route_cache.get('c'))
+        self.assertIsNone(route_cache.get('b'))
+        route_cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from lxml import etree
+
+from xml2drawio.xml2drawio import DEBUG, SILENT, SUMMARY, Converter, UnknownElementError, path_steps
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+ROUTE_WITH_COMMA = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans">
+    <camelContext id="ctx" xmlns="http://camel.apache.org/schema/spring">
+        <route>
+            <from uri="file:in?include=a,b"/>
+            <to uri="direct:out"/>
+        </route>
+    </camelContext>
+</beans>
+'''
+
+LINKED_ROUTES = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans">
+    <camelContext id="first" xmlns="http://camel.apache.org/schema/spring">
+        <route id="orders">
+            <from uri="file:in"/>
+            <to uri="direct:validate"/>
+            <wireTap uri="vm:audit?size=10"/>
+        </route>
+        <route id="validate">
+            <from uri="direct:validate"/>
+            <toD uri="seda:missing"/>
+        </route>
+    </camelContext>
+    <camelContext id="second" xmlns="http://camel.apache.org/schema/spring">
+        <route id="audit">
+            <from uri="vm:audit"/>
+            <to uri="direct:validate"/>
+        </route>
+    </camelContext>
+</beans>
+'''
+
+CONFIGURATION_AND_BEANS = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans">
+    <camelContext id="ctx" xmlns="http://camel.apache.org/schema/spring">
+        <errorHandler id="eh" type="DefaultErrorHandler"/>
+        <redeliveryPolicyProfile id="policy" maximumRedeliveries="3"/>
+        <route id="orders">
+            <from uri="direct:orders"/>
+            <bean ref="orderService" method="validate"/>
+            <split><simple>${body}</simple><to uri="direct:line"/></split>
+        </route>
+    </camelContext>
+</beans>
+'''
+
+
+class TestConverter(unittest.TestCase):
+
+    def write_xml(self, content):
+        fd, path = tempfile.mkstemp(suffix='.xml')
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_labels_with_commas_are_escaped(self):
+        converter = Converter()
+        converter.convert_file(self.write_xml(ROUTE_WITH_COMMA))
+
+        diagram = converter.diagram()
+        csv_data = diagram.partition('## CSV data starts below this line\n')[2]
+        rows = list(csv.reader(io.StringIO(csv_data.strip())))
+
+        self.assertEqual(rows[0], ['id', 'component', 'shape', 'refs'])
+        self.assertEqual(rows[1][1:], ['file:in?include=a,b', 'mxgraph.eip.polling_consumer', ''])
+        self.assertEqual(rows[2][1:3], ['to', 'rect'])
+
+    def test_verbosity_levels(self):
+        xml_path = self.write_xml(ROUTE_WITH_COMMA)
+
+        def events(verbosity):
+            output = io.StringIO()
+            Converter(verbosity=verbosity, events=output).convert_file(xml_path)
+            return [json.loads(line)['event'] for line in output.getvalue().splitlines()]
+
+        self.assertEqual(events(SILENT), [])
+        self.assertEqual(events(SUMMARY), ['processing camel context', 'converted'])
+        self.assertEqual(events(DEBUG).count('processing node'), 3)
+
+    def test_custom_handlers(self):
+        class CustomConverter(Converter):
+
+            def to_def(self, node, parent_id):
+                self.emit('custom', node.attrib['uri'], 'rect', parent_id)
+
+        @CustomConverter.register('audit')
+        def audit_def(converter, node, parent_id):
+            converter.emit('audit', 'audit', 'mxgraph.eip.wire_tap', parent_id)
+
+        xml_path = self.write_xml(ROUTE_WITH_COMMA.replace('<to uri="direct:out"/>',
+                                                           '<to uri="direct:out"/><audit/>'))
+        rows = CustomConverter().convert_file(xml_path)
+
+        self.assertEqual([row[:3] for row in rows[1:]],
+                         [('custom', 'direct:out', 'rect'), ('audit', 'audit', 'mxgraph.eip.wire_tap')])
+        self.assertNotIn('{http://camel.apache.org/schema/spring}audit', Converter.handlers)
+
+    def test_unknown_elements(self):
+        xml_path = self.write_xml(ROUTE_WITH_COMMA.replace('<to uri="direct:out"/>',
+                                                           '<throttle><to uri="direct:out"/></throttle><throttle/>'))
+
+        with self.assertRaises(UnknownElementError) as raised:
+            Converter(verbosity=SILENT).convert_file(xml_path)
+        self.assertEqual((raised.exception.name, raised.exception.line), ('throttle', 6))
+
+        converter = Converter(verbosity=SILENT, unknown='generic')
+        rows = converter.convert_file(xml_path)
+        self.assertEqual([row[1:3] for row in rows[1:]],
+                         [('throttle', 'mxgraph.eip.message_translator'), ('to', 'rect'),
+                          ('throttle', 'mxgraph.eip.message_translator')])
+        self.assertEqual(rows[2][3], rows[1][0])
+        self.assertEqual(converter.unknown_report(), {'throttle': {'count': 2, 'lines': [6, 6]}})
+
+        rows = Converter(verbosity=SILENT, unknown='skip').convert_file(xml_path)
+        self.assertEqual([row[1] for row in rows], ['file:in?include=a,b', 'to'])
+        self.assertEqual(rows[1][3], rows[0][0])
+
+    def test_route_links(self):
+        xml_path = self.write_xml(LINKED_ROUTES)
+        converter = Converter(verbosity=SILENT, id_strategy='sequential')
+        rows = converter.convert_file(xml_path)
+        labels = {row[0]: row[1] for row in rows}
+
+        # direct endpoints are local to the camel context, vm endpoints are shared
+        self.assertEqual([(labels[source], labels[target]) for source, target in converter.route_links()],
+                         [('to', 'validate'), ('wire tap', 'audit')])
+        self.assertIn(f'{rows[3][0]},validate,mxgraph.eip.polling_consumer,{rows[1][0]}', converter.diagram())
+
+    def test_sharded_walk_matches_the_single_process_walk(self):
+        linked_routes = self.write_xml(LINKED_ROUTES.replace('<toD uri="seda:missing"/>', '<throttle/>'))
+        for xml_path, unknown in ((CAMEL_CONTEXT, 'fail'), (linked_routes, 'generic')):
+            for id_strategy in ('sequential', 'hash'):
+                results = []
+                for route_workers in (None, 2):
+                    converter = Converter(verbosity=SILENT, id_strategy=id_strategy, unknown=unknown,
+                                          route_workers=route_workers)
+                    converter.convert_file(xml_path)
+                    results.append((converter.rows, converter.sections, converter.route_links(),
+                                    converter.unknown_report()))
+                self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][3], {'throttle': {'count': 1, 'lines': [11]}})
+
+        with self.assertRaises(UnknownElementError):
+            Converter(verbosity=SILENT, route_workers=2).convert_file(linked_routes)
+
+    def test_beans_and_configuration(self):
+        rows = Converter(verbosity=SILENT, id_strategy='sequential').convert_file(
+            self.write_xml(CONFIGURATION_AND_BEANS))
+
+        self.assertEqual([row[1:] for row in rows],
+                         [('orders', 'mxgraph.eip.polling_consumer', ''), ('orderService.validate', 'rect', 2),
+                          ('split', 'mxgraph.eip.splitter', 2), ('to', 'rect', 4)])
+
+    def test_hash_id_paths_match_getpath(self):
+        # the paths are built while walking, the ids stay the ones of the getpath paths
+        root = etree.fromstring(LINKED_ROUTES.replace('<toD', '<!-- c --><x:toD xmlns:x="urn:x"/><toD').encode())
+        tree = root.getroottree()
+        for parent in root.iter(etree.Element):
+            for child, step in path_steps(parent):
+                self.assertEqual(tree.getpath(parent) + step, tree.getpath(child))
+
+    def test_walkers_emit_the_same_rows(self):
+        rows = [Converter(id_strategy='sequential', walker=walker).convert_file(CAMEL_CONTEXT)
+                for walker in ('iterative', 'recursive')]
+        self.assertEqual(rows[0], rows[1])
+
+    def test_iterative_walker_handles_deep_nesting(self):
+        depth = 1000
+        xml = ROUTE_WITH_COMMA.replace('<to uri="direct:out"/>',
+                                       '<choice><when>' * depth + '<to uri="direct:out"/>' + '</when></choice>' * depth)
+        root = etree.fromstring(xml.encode(), etree.XMLParser(huge_tree=True))
+
+        converter = Converter(walker='iterative')
+        converter.walk(root)
+        self.assertEqual(len(converter.rows), depth + 2)
+        self.assertEqual(converter.rows[-1][3], converter.rows[-2][0])
+
+        with self.assertRaises(RecursionError):
+            Converter(walker='recursive').walk(root)
+
+    def test_deprecated_processor(self):
+        uris = {
+            'direct:${property.orderId}': 'direct:${exchangeProperty.orderId}',
+            'log:${header.CamelFileName}': 'log:${headers.CamelFileName}',
+            'http://{{host}}/${api.path}?q="x"\n': "http://{{host}}/{{api.path}}?q='x'",
+            'sql:select ${headers.id}, ${a}, ${a}': 'sql:select ${headers.id}, {{a}}, {{a}}',
+        }
+        for uri, expected in uris.items():
+            self.assertEqual(Converter.deprecatedProcessor(uri), expected)
+
+        before = Converter.uri_cache_info()['deprecatedProcessor']
+        Converter.deprecatedProcessor('direct:${property.orderId}')
+        after = Converter.uri_cache_info()['deprecatedProcessor']
+        self.assertEqual(after['hits'], before['hits'] + 1)
+        self.assertEqual(after['misses'], before['misses'])
+        self.assertEqual(Converter.componentOptions('velocity:a.vm'), 'velocity:a.vm?contentCache=true')
+
+
+if __name__ == '__main__':
+    unittest.main()
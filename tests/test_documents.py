@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from xml2drawio.documents import DocumentCache
+from xml2drawio.xml2drawio import Converter
+
+MAIN = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans">
+    <import resource="classpath:shared/endpoints.xml"/>
+    <camelContext id="main" xmlns="http://camel.apache.org/schema/spring">
+        <route id="orders">
+            <from uri="direct:orders"/>
+            <to uri="ref:sharedEndpoint"/>
+        </route>
+    </camelContext>
+</beans>
+'''
+
+ENDPOINTS = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans">
+    <import resource="beans.xml"/>
+    <camelContext id="shared" xmlns="http://camel.apache.org/schema/spring">
+        <endpoint id="sharedEndpoint" uri="jms:queue:orders"/>
+    </camelContext>
+</beans>
+'''
+
+BEANS = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans">
+    <import resource="endpoints.xml"/>
+    <bean id="orderService" class="com.demo.OrderService"/>
+</beans>
+'''
+
+LOCAL_BEANS = '''<?xml version="1.0" encoding="UTF-8"?>
+<beans xmlns="http://www.springframework.org/schema/beans">
+    <import resource="shared/beans.xml"/>
+    <camelContext id="main" xmlns="http://camel.apache.org/schema/spring">
+        <route id="orders">
+            <from uri="direct:orders"/>
+            <bean ref="localBean" method="go"/>
+            <bean ref="orderService" method="go"/>
+        </route>
+    </camelContext>
+    <bean id="localBean" class="com.demo.Local"/>
+</beans>
+'''
+
+
+class TestImports(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        os.makedirs(os.path.join(self.tmp, 'shared'))
+        for name, content in (('main.xml', MAIN), ('shared/endpoints.xml', ENDPOINTS), ('shared/beans.xml', BEANS)):
+            with open(os.path.join(self.tmp, name), 'w') as f:
+                f.write(content)
+        self.main = os.path.join(self.tmp, 'main.xml')
+
+    def test_imported_ids_are_resolved_and_files_parsed_once(self):
+        document_cache = DocumentCache()
+        for stream in (False, True):
+            converter = Converter(document_cache=document_cache)
+            rows = converter.convert_file(self.main, stream=stream)
+
+            self.assertEqual([row[1] for row in rows], ['orders', 'to'])
+            self.assertEqual(converter.endpoints, {'sharedEndpoint': 'jms:queue:orders'})
+            self.assertEqual(converter.bean_refs, {'orderService': 'com.demo.OrderService'})
+        self.assertEqual(document_cache.parses, 2)
+
+    def test_changed_files_are_parsed_again(self):
+        document_cache = DocumentCache()
+        Converter(document_cache=document_cache).convert_file(self.main)
+        beans = os.path.join(self.tmp, 'shared', 'beans.xml')
+        stat = os.stat(beans)
+        os.utime(beans, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        Converter(document_cache=document_cache).convert_file(self.main)
+        self.assertEqual(document_cache.parses, 3)
+
+    def test_own_beans_are_indexed(self):
+        # the bean is declared after the camel context, stream mode reads the ids before converting
+        local = os.path.join(self.tmp, 'local.xml')
+        with open(local, 'w') as f:
+            f.write(LOCAL_BEANS)
+        for stream in (False, True):
+            rows = Converter(document_cache=DocumentCache()).convert_file(local, stream=stream)
+            self.assertEqual([row[1] for row in rows], ['orders', 'com.demo.Local.go', 'com.demo.OrderService.go'])
+
+    def test_imports_can_be_disabled(self):
+        with self.assertRaises(KeyError):
+            Converter(follow_imports=False, document_cache=DocumentCache()).convert_file(self.main)
+
+
+if __name__ == '__main__':
+    unittest.main()
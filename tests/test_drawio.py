@@ -0,0 +1,91 @@
+import base64
+import io
+import os
+import unittest
+import urllib.parse
+import zlib
+
+from lxml import etree
+
+from xml2drawio import drawio
+from xml2drawio.xml2drawio import Converter
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestDrawio(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = Converter(id_strategy='sequential').convert_file(CAMEL_CONTEXT)
+
+    def graph_model(self, compressed=False):
+        output = io.StringIO()
+        drawio.write_drawio(output, self.rows, compressed=compressed)
+        parser = etree.XMLParser(remove_blank_text=True)
+        diagram = etree.fromstring(output.getvalue(), parser).find('diagram')
+        if compressed:
+            inflated = zlib.decompress(base64.b64decode(diagram.text), -15).decode()
+            return etree.fromstring(urllib.parse.unquote(inflated), parser)
+        return diagram.find('mxGraphModel')
+
+    def test_cells(self):
+        model = self.graph_model()
+        vertices = model.findall('root/mxCell[@vertex="1"]')
+        edges = model.findall('root/mxCell[@edge="1"]')
+
+        node_ids = {str(row[0]) for row in self.rows}
+        self.assertEqual({cell.get('id') for cell in vertices}, {'n' + node_id for node_id in node_ids})
+        roots = {str(row[0]) for row in self.rows if row[3] == ''}
+        self.assertEqual(len(roots), 3)
+        self.assertEqual(len(edges), len(node_ids) - len(roots))
+        vertex_ids = {cell.get('id') for cell in vertices}
+        for edge in edges:
+            self.assertIn(edge.get('source'), vertex_ids)
+            self.assertIn(edge.get('target'), vertex_ids)
+
+    def test_calls(self):
+        output = io.StringIO()
+        drawio.write_drawio(output, self.rows, calls=[(self.rows[3][0], self.rows[-1][0]), ('missing', 2)])
+        calls = etree.fromstring(output.getvalue()).findall('diagram/mxGraphModel/root/mxCell[@id="c0"]')
+        self.assertEqual([(cell.get('source'), cell.get('target')) for cell in calls],
+                         [(f'n{self.rows[3][0]}', f'n{self.rows[-1][0]}')])
+        self.assertNotIn('id="c1"', output.getvalue())
+
+    def test_layout_is_a_horizontal_tree(self):
+        model = self.graph_model()
+        geometry = {cell.get('id'): (float(cell.find('mxGeometry').get('x')), float(cell.find('mxGeometry').get('y')))
+                    for cell in model.findall('root/mxCell[@vertex="1"]')}
+
+        self.assertEqual(len(set(geometry.values())), len(geometry))
+        for edge in model.findall('root/mxCell[@edge="1"]'):
+            self.assertLess(geometry[edge.get('source')][0], geometry[edge.get('target')][0])
+
+    def test_compressed_payload(self):
+        self.assertEqual(etree.tostring(self.graph_model(compressed=True)), etree.tostring(self.graph_model()))
+
+    def test_deep_tree_layout(self):
+        rows = [(index, 'to', 'rect', index - 1 if index else '') for index in range(5000)]
+        _, _, children, roots = drawio.build_tree(rows)
+        positions = drawio.layout(roots, children)
+        self.assertEqual(positions['4999'], (4999 * (drawio.WIDTH + drawio.LEVEL_SPACING), 0))
+
+    def test_pages(self):
+        converter = Converter(id_strategy='sequential')
+        converter.convert_file(CAMEL_CONTEXT)
+
+        self.assertEqual([name for name, _ in converter.pages('context')], ['ctx-BT_route'])
+        pages = converter.pages('route')
+        self.assertEqual([name for name, _ in pages],
+                         ['ctx-BT_route/ROUTE_BT_route', 'ctx-BT_route/MailNotification',
+                          'ctx-BT_route/direct:do-try-test'])
+        self.assertEqual(sum(len(rows) for _, rows in pages), len(converter.rows))
+
+        mxfile = etree.fromstring(converter.paged_diagram('route'))
+        diagrams = mxfile.findall('diagram')
+        self.assertEqual([diagram.get('id') for diagram in diagrams], ['index', 'page-0', 'page-1', 'page-2'])
+        links = [user_object.get('link') for user_object in diagrams[0].iter('UserObject')]
+        self.assertEqual(links, ['data:page/id,page-0', 'data:page/id,page-1', 'data:page/id,page-2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import pickle
+import unittest
+
+from xml2drawio.graph import Graph
+from xml2drawio.xml2drawio import SILENT, Converter, convert
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = Graph([(1, 'route', 'mxgraph.eip.messageChannel', ''), (2, 'to', 'mxgraph.eip.messageChannel', 1),
+                            (3, 'log', 'mxgraph.eip.wire_tap', 1)])
+
+    def test_reads_as_rows(self):
+        self.assertEqual(len(self.graph), 3)
+        self.assertEqual(self.graph[1], (2, 'to', 'mxgraph.eip.messageChannel', 1))
+        self.assertEqual(self.graph[-1][2], 'mxgraph.eip.wire_tap')
+        self.assertEqual(self.graph[1:], [(2, 'to', 'mxgraph.eip.messageChannel', 1),
+                                          (3, 'log', 'mxgraph.eip.wire_tap', 1)])
+        self.assertEqual(list(self.graph), [self.graph[0], self.graph[1], self.graph[2]])
+        self.assertEqual(self.graph.edges(), [(1, 2), (1, 3)])
+        self.assertEqual(pickle.loads(pickle.dumps(self.graph)), self.graph)
+
+    def test_shapes_and_labels_are_shared(self):
+        self.graph.add(4, ''.join(['t', 'o']), 'mxgraph.eip.messageChannel', 1)
+
+        self.assertEqual(self.graph.shape_table, ['mxgraph.eip.messageChannel', 'mxgraph.eip.wire_tap'])
+        self.assertEqual(list(self.graph.shapes), [0, 0, 1, 0])
+        self.assertIs(self.graph.labels[3], self.graph.labels[1])
+
+    def test_converter_rows(self):
+        converter = Converter(verbosity=SILENT, id_strategy='sequential')
+        rows = converter.convert_file(CAMEL_CONTEXT)
+
+        self.assertIsInstance(rows, Graph)
+        diagram = convert(CAMEL_CONTEXT, id_strategy='sequential')
+        self.assertEqual(diagram.nodes, [row[:3] for row in rows])
+        self.assertEqual(diagram.edges, [(ref, node_id) for node_id, _, _, ref in rows if ref != ''])
+
+
+if __name__ == '__main__':
+    unittest.main()
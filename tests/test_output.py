@@ -0,0 +1,49 @@
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from xml2drawio import output
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def run_cli(self, *args):
+        return subprocess.run([sys.executable, '-m', 'xml2drawio.xml2drawio', '--xml', CAMEL_CONTEXT, '--no-cache',
+                               *args], capture_output=True, text=True, check=True)
+
+    def test_stdout_has_only_the_diagram(self):
+        result = self.run_cli('--format', 'drawio')
+        self.assertTrue(result.stdout.startswith('<mxfile host="xml2drawio">'))
+        self.assertTrue(result.stdout.endswith('</mxfile>\n'))
+        self.assertIn('converted', result.stderr)
+
+    def test_files(self):
+        plain = os.path.join(self.tmp, 'diagram.csv')
+        compressed = os.path.join(self.tmp, 'diagram.csv.gz')
+        self.run_cli('--output', plain, '--ids', 'hash')
+        self.run_cli('--output', compressed, '--ids', 'hash')
+
+        with open(plain) as f, gzip.open(compressed, 'rt') as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_open_output(self):
+        path = os.path.join(self.tmp, 'out.txt.gz')
+        with output.open_output(path) as f:
+            f.write('row\n' * 3)
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(f.read(), 'row\n' * 3)
+        self.assertIsNone(output.unsupported(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import io
+import os
+import unittest
+
+from lxml import etree
+
+from xml2drawio import parsing
+from xml2drawio.xml2drawio import SILENT, Converter
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_sources(self):
+        root = parsing.parse(CAMEL_CONTEXT)
+        with open(CAMEL_CONTEXT, 'rb') as f:
+            body = f.read()
+
+        self.assertEqual(root.getroottree().docinfo.URL, CAMEL_CONTEXT)
+        for source in (body, io.BytesIO(body), io.StringIO(body.decode())):
+            self.assertEqual(etree.tostring(parsing.parse(source)), etree.tostring(root))
+        self.assertIs(parsing.shared_parser(), parsing.shared_parser())
+
+    def test_skipped_subtrees_are_emptied_in_place(self):
+        root = parsing.parse(b'<beans xmlns:c="http://camel.apache.org/schema/spring"><c:camelContext>'
+                             b'<c:dataFormats><c:json id="j"/></c:dataFormats>\n  <c:route>'
+                             b'<c:description>long text</c:description><c:from uri="direct:a"/></c:route>'
+                             b'<!-- comment --></c:camelContext></beans>')
+
+        context = root[0]
+        self.assertEqual(len(context), 2)
+        self.assertEqual(len(context[0]), 0)
+        self.assertIsNone(context[0].text)
+        self.assertIsNone(context[1][0].text)
+        self.assertEqual(context[1][1].attrib['uri'], 'direct:a')
+
+    def test_errors_reset_the_parser(self):
+        with self.assertRaises(etree.XMLSyntaxError):
+            parsing.parse(b'<beans>')
+        self.assertEqual(parsing.parse(b'<beans/>').tag, 'beans')
+
+    def test_same_rows_as_objectify(self):
+        for id_strategy in ('sequential', 'hash'):
+            rows = [Converter(verbosity=SILENT, id_strategy=id_strategy, parser=parser).convert_file(CAMEL_CONTEXT)
+                    for parser in ('etree', 'objectify')]
+            self.assertEqual(rows[0], rows[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from xml2drawio.profiling import Profiler
+from xml2drawio.xml2drawio import SILENT, Converter
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_handlers_and_phases(self):
+        profiler = Profiler()
+        rows = Converter(verbosity=SILENT, id_strategy='sequential', profiler=profiler).convert_file(CAMEL_CONTEXT)
+
+        report = profiler.report()
+        self.assertEqual(rows, Converter(verbosity=SILENT, id_strategy='sequential').convert_file(CAMEL_CONTEXT))
+        self.assertEqual(report['handlers']['to_def']['calls'], 5)
+        self.assertEqual(report['handlers']['route_def']['calls'], 3)
+        self.assertEqual(list(report['phases']), ['parse', 'uri rewriting', 'walk', 'reduce'])
+        self.assertGreater(report['peak_rss'], 0)
+        self.assertNotIn('traced_peak_bytes', report)
+        self.assertIs(Converter.handlers['{http://camel.apache.org/schema/spring}to'], Converter.to_def)
+
+    def test_cprofile(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        profiler = Profiler(os.path.join(tmp, 'run.pstats'))
+
+        profiler.start()
+        Converter(verbosity=SILENT, profiler=profiler).convert_file(CAMEL_CONTEXT)
+        profiler.stop()
+
+        self.assertGreater(profiler.report()['traced_peak_bytes'], 0)
+        functions = {name for _, _, name in pstats.Stats(profiler.pstats_path).stats}
+        self.assertIn('walk', functions)
+        profiler.write_json(os.path.join(tmp, 'profile.json'))
+        self.assertTrue(os.path.exists(os.path.join(tmp, 'profile.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
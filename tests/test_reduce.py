@@ -0,0 +1,67 @@
+import os
+import unittest
+
+from xml2drawio.reduce import reduce_rows
+from xml2drawio.xml2drawio import SILENT, Converter, convert
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+SEQUENCE = b'''<beans xmlns="http://www.springframework.org/schema/beans">
+<camelContext xmlns="http://camel.apache.org/schema/spring">
+    <route id="r">
+        <from uri="direct:r"/>
+        <to uri="mock:a"/>
+        <to uri="mock:b"/>
+        <multicast><to uri="mock:c"/><to uri="mock:d"/></multicast>
+        <to uri="mock:e"/>
+        <to uri="mock:f"/>
+    </route>
+</camelContext>
+</beans>'''
+
+
+class TestReduce(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = Converter(verbosity=SILENT, id_strategy='sequential').convert_file(CAMEL_CONTEXT)
+
+    def test_chains(self):
+        rows, owners = reduce_rows(convert(SEQUENCE, id_strategy='sequential').rows, 'chains')
+
+        self.assertEqual([row[1] for row in rows], ['r', 'to … to (2)', 'multicast', 'to', 'to', 'to … to (2)'])
+        self.assertEqual(owners, [0, 1, 1, 3, 4, 5, 6, 6])
+
+    def test_chains_keep_choice_branches(self):
+        # the when and otherwise branches are children of the choice, they are alternatives and not a chain
+        rows, owners = reduce_rows(self.rows, 'chains')
+
+        self.assertEqual(rows, list(self.rows))
+        self.assertEqual(owners, list(range(len(self.rows))))
+
+    def test_routes(self):
+        rows, owners = reduce_rows(self.rows, 'routes', depth=1)
+
+        self.assertEqual([row[:2] for row in rows],
+                         [(2, 'ROUTE_BT_route'), (3, 'choice (+8)'), (12, 'MailNotification'),
+                          (13, 'direct:do-try-test')])
+        self.assertEqual(owners[2:10], [1] * 8)
+        self.assertEqual(reduce_rows(self.rows, 'routes', depth=0)[0][0][1], 'ROUTE_BT_route (+9)')
+
+    def test_prune(self):
+        rows, owners = reduce_rows(self.rows, 'prune', depth=1)
+
+        self.assertEqual([row[:2] for row in rows],
+                         [(2, 'ROUTE_BT_route'), (3, 'choice'), (12, 'MailNotification'), (13, 'direct:do-try-test')])
+        self.assertEqual(owners, [0, 1] + [None] * 8 + [10, 11])
+
+    def test_converter_keeps_pages_and_links(self):
+        converter = Converter(verbosity=SILENT, id_strategy='sequential', reduction='routes', reduce_depth=0)
+        converter.convert_file(CAMEL_CONTEXT)
+
+        self.assertEqual(len(converter.rows), 3)
+        self.assertEqual([len(rows) for _, rows in converter.pages('route')], [1, 1, 1])
+        self.assertEqual([converter.rows[index][0] for index, _, _, _ in converter.endpoint_refs], [12, 13])
+
+
+if __name__ == '__main__':
+    unittest.main()
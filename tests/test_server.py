@@ -0,0 +1,70 @@
+import http.client
+import os
+import threading
+import unittest
+
+from xml2drawio import server
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = server.make_server(port=0, workers=1, max_body=100000, verbose=False)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+        with open(CAMEL_CONTEXT, 'rb') as f:
+            cls.body = f.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server.executor.shutdown()
+        cls.thread.join()
+
+    def request(self, method, path, body=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=30)
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        result = response.status, response.getheader('X-Cache'), response.read().decode()
+        connection.close()
+        return result
+
+    def raw_request(self, headers, body):
+        # the headers are sent as they are, http.client would add a valid Content-Length
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=30)
+        connection.putrequest('POST', '/convert')
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders(body)
+        status = connection.getresponse().status
+        connection.close()
+        return status
+
+    def test_convert(self):
+        status, _, diagram = self.request('POST', '/convert?format=drawio&ids=hash', self.body)
+        self.assertEqual(status, 200)
+        self.assertIn('<mxGraphModel>', diagram)
+
+        self.assertEqual(self.request('POST', '/convert?format=drawio&ids=hash', self.body), (200, 'hit', diagram))
+        self.assertEqual(self.request('POST', '/convert?ids=hash', self.body)[1], 'miss')
+
+    def test_errors(self):
+        self.assertEqual(self.request('POST', '/convert', b'<beans>')[0], 400)
+        self.assertEqual(self.request('POST', '/convert?format=pdf', self.body)[0], 400)
+        self.assertEqual(self.request('POST', '/convert', b' ' * 100001)[0], 413)
+        self.assertEqual(self.request('GET', '/health')[0], 200)
+
+    def test_content_length(self):
+        self.assertEqual(self.raw_request({}, self.body), 411)
+        self.assertEqual(self.raw_request({'Content-Length': 'many'}, self.body), 400)
+        # a negative length would read the body until the client closes, past max_body
+        self.assertEqual(self.raw_request({'Content-Length': '-1'}, b' ' * 100001), 400)
+        self.assertEqual(self.raw_request({'Content-Length': str(len(self.body))}, self.body), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
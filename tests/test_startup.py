@@ -0,0 +1,64 @@
+import subprocess
+import sys
+import unittest
+
+from xml2drawio import version
+
+# modules only needed by the command line, the terminal output, the route cache or the writers
+DEFERRED_MODULES = ('rich', 'configargparse', 'importlib.metadata', 'sqlite3', 'lxml.objectify', 'xml2drawio.cache',
+                    'xml2drawio.drawio')
+
+
+def import_times(statement):
+    # {module: cumulative microseconds} reported by python -X importtime
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+            _, cumulative, name = line.split('|')
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def imported_modules(statement):
+    result = subprocess.run([sys.executable, '-c', f'import sys; before = set(sys.modules); {statement}; '
+                             'print(len(set(sys.modules) - before))'], capture_output=True, text=True, check=True)
+    return int(result.stdout)
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_defers_heavy_modules(self):
+        times = import_times('import xml2drawio.xml2drawio')
+
+        self.assertIn('xml2drawio.xml2drawio', times)
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_import_size(self):
+        # times are too noisy to compare across machines, the modules imported besides lxml are counted
+        # instead: about 25 today, more than 120 with rich, configargparse and sqlite3 imported eagerly
+        own = imported_modules('import xml2drawio.xml2drawio') - imported_modules('import lxml.etree')
+        self.assertLess(own, 40)
+
+    def test_help_defers_metadata_and_cache(self):
+        times = import_times('import sys; sys.argv = ["xml2drawio", "--help"]\n'
+                             'from xml2drawio.xml2drawio import main\ntry:\n    main()\nexcept SystemExit:\n    pass')
+
+        self.assertIn('configargparse', times)
+        for module in ('importlib.metadata', 'sqlite3', 'xml2drawio.cache', 'rich'):
+            self.assertNotIn(module, times)
+
+    def test_version_and_help(self):
+        def run(*args):
+            return subprocess.run([sys.executable, '-m', 'xml2drawio.xml2drawio', *args],
+                                  capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(run('--version').strip(), version())
+        self.assertEqual(run('--xml', 'missing.xml', '--version').strip(), version())
+        self.assertIn('--xml', run('--help'))
+
+
+if __name__ == '__main__':
+    unittest.main()
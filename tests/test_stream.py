@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from xml2drawio.xml2drawio import Converter
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestStream(unittest.TestCase):
+
+    def convert(self, stream, id_strategy='sequential'):
+        return Converter(id_strategy=id_strategy).convert_file(CAMEL_CONTEXT, stream=stream)
+
+    def test_stream_matches_tree_walk(self):
+        tree_rows = self.convert(stream=False)
+        self.assertTrue(tree_rows)
+        self.assertEqual(self.convert(stream=True), tree_rows)
+
+    def test_stream_hash_ids_match_tree_walk(self):
+        self.assertEqual(self.convert(stream=True, id_strategy='hash'), self.convert(stream=False, id_strategy='hash'))
+
+    def test_deep_nesting(self):
+        # deeper than the 256 levels libxml2 allows without huge_tree
+        depth = 300
+        fd, path = tempfile.mkstemp(suffix='.xml')
+        with os.fdopen(fd, 'w') as f:
+            f.write('<beans xmlns="http://www.springframework.org/schema/beans">'
+                    '<camelContext xmlns="http://camel.apache.org/schema/spring"><route><from uri="direct:in"/>'
+                    + '<choice><when><simple>true</simple>' * depth + '<to uri="direct:out"/>'
+                    + '</when></choice>' * depth + '</route></camelContext></beans>')
+        self.addCleanup(os.remove, path)
+
+        rows = Converter(id_strategy='sequential').convert_file(path, stream=True)
+        self.assertEqual(len(rows), depth + 2)
+        self.assertEqual(rows, Converter(id_strategy='sequential').convert_file(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
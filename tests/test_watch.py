@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from xml2drawio import watch
+from xml2drawio.cache import RouteCache
+from xml2drawio.xml2drawio import SILENT, Converter
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.xml_path = os.path.join(self.tmp, 'context.xml')
+        shutil.copy(CAMEL_CONTEXT, self.xml_path)
+        self.output_path = os.path.join(self.tmp, 'context.csv')
+
+    def wait_for(self, condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_changes_are_rendered_again(self):
+        route_cache = RouteCache(in_memory=True)
+        converter = Converter(cache=route_cache, verbosity=SILENT, id_strategy='sequential')
+        renders = []
+        thread = threading.Thread(target=lambda: renders.append(
+            watch.watch(converter, self.xml_path, self.tmp, debounce=0.05, interval=0.01, max_renders=2)))
+        thread.start()
+        self.wait_for(lambda: os.path.exists(self.output_path))
+
+        with open(self.xml_path) as f:
+            content = f.read()
+        # two quick saves are converted once
+        for label in ('MailNotificationV1', 'MailNotificationV2'):
+            with open(self.xml_path, 'w') as f:
+                f.write(content.replace('id="MailNotification"', f'id="{label}"'))
+            stat = os.stat(self.xml_path)
+            os.utime(self.xml_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        thread.join(timeout=10)
+
+        self.assertEqual(renders, [2])
+        with open(self.output_path) as f:
+            diagram = f.read()
+        self.assertIn('MailNotificationV2', diagram)
+        self.assertEqual(route_cache.connection.execute('SELECT COUNT(*) FROM routes').fetchone()[0], 4)
+        route_cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
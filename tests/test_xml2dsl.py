@@ -1,11 +1,22 @@
+import os
 import unittest
-from xml2drawio.xml2drawio import xml_to_drawio
-from unittest import TestCase, mock
+
+from xml2drawio.xml2drawio import Converter
+
+CAMEL_CONTEXT = os.path.join(os.path.dirname(__file__), 'camel-context.xml')
+
 
 class TestScript(unittest.TestCase):
 
-    def test_upper(self):
-        self.assertEqual(xml_to_drawio(), 0)
+    def test_xml_to_drawio(self):
+        converter = Converter()
+        rows = converter.convert_file(CAMEL_CONTEXT)
+
+        self.assertEqual([label for _, label, shape, _ in rows if shape == 'mxgraph.eip.polling_consumer'],
+                         ['ROUTE_BT_route', 'MailNotification', 'direct:do-try-test'])
+        self.assertEqual(len(rows), 12)
+        self.assertIn('id,component,shape,refs\n', converter.diagram())
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()